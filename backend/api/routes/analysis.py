@@ -1,10 +1,14 @@
 from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, Body
-from typing import Optional, Dict
-from openai import OpenAI
+from typing import List, Optional, Dict
+from pydantic import BaseModel
+import httpx
+from openai import AsyncOpenAI
 from sqlalchemy.orm import Session
 from core.database import get_db
 from services.ai.analysis_service import AnalysisService
 from models.base import Analysis, DataDictionary, CodeSnippet, QueryExecution
+import codecs
+import hashlib
 import os
 from dotenv import load_dotenv
 import json
@@ -15,8 +19,30 @@ load_dotenv()
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
-# Configure OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Maximum accepted upload size for /analyze (2 MB)
+MAX_UPLOAD_BYTES = 2_000_000
+
+class QueryExecutionResponse(BaseModel):
+    id: int
+    user_id: int
+    analysis_id: Optional[int] = None
+    execution_time: Optional[datetime] = None
+    execution_status: Optional[str] = None
+    execution_duration: Optional[int] = None
+    error_message: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# Configure OpenAI (async client so LLM latency doesn't block the event loop).
+# A shared keep-alive pool lets batched calls reuse warm TLS connections
+# instead of handshaking per request.
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+)
 
 @router.post("/analyze")
 async def analyze_code(
@@ -28,15 +54,61 @@ async def analyze_code(
 ):
     try:
         if file:
-            content = await file.read()
-            code_to_analyze = content.decode()
+            # Stream the upload instead of buffering the whole body at once,
+            # rejecting oversized files before they can exhaust memory
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            parts = []
+            received = 0
+            while chunk := await file.read(64 * 1024):
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large (limit is {MAX_UPLOAD_BYTES} bytes)"
+                    )
+                parts.append(decoder.decode(chunk))
+            parts.append(decoder.decode(b"", final=True))
+            code_to_analyze = ''.join(parts)
         elif code:
             code_to_analyze = code
         else:
             raise HTTPException(status_code=400, detail="No code provided")
 
+        # Re-running an unchanged analysis is a no-op: if the stored code hash
+        # matches, return the persisted results without re-parsing or calling the LLM
+        code_hash = hashlib.blake2b(code_to_analyze.encode(), digest_size=16).hexdigest()
+        if analysis_id:
+            cached = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+            if cached and cached.code_hash == code_hash and cached.analysis_results:
+                return {
+                    "analysis_id": cached.id,
+                    "results": cached.analysis_results,
+                    "data_dictionaries": [
+                        {
+                            "table_name": dd.table_name,
+                            "column_name": dd.column_name,
+                            "data_type": dd.data_type,
+                            "description": dd.description,
+                            "valid_values": dd.valid_values,
+                            "relationships": dd.relationships
+                        } for dd in db.query(DataDictionary).filter(
+                            DataDictionary.analysis_id == cached.id
+                        ).all()
+                    ],
+                    "code_chunks": [
+                        {
+                            "code": chunk.code,
+                            "language": chunk.language,
+                            "purpose": chunk.purpose,
+                            "dependencies": chunk.dependencies
+                        } for chunk in db.query(CodeSnippet).filter(
+                            CodeSnippet.analysis_id == cached.id
+                        ).all()
+                    ]
+                }
+
         analysis_service = AnalysisService(db, client)
-        
+
         # First, create or update the analysis
         analysis_result = await analysis_service.analyze_code(
             code_to_analyze, 
@@ -50,6 +122,13 @@ async def analyze_code(
             code_to_analyze
         )
         
+        # Remember what was analyzed so identical re-runs can short-circuit
+        if analysis_result["analysis_id"]:
+            db.query(Analysis).filter(
+                Analysis.id == analysis_result["analysis_id"]
+            ).update({"code_hash": code_hash})
+            db.commit()
+
         # Get stored code chunks
         code_chunks = db.query(CodeSnippet).filter(
             CodeSnippet.analysis_id == analysis_result["analysis_id"]
@@ -78,6 +157,8 @@ async def analyze_code(
             ]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -134,7 +215,7 @@ async def get_analysis(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/query-executions")
+@router.get("/query-executions", response_model=List[QueryExecutionResponse])
 async def get_query_executions(
     user_id: Optional[int] = None,
     analysis_id: Optional[int] = None,
@@ -149,17 +230,9 @@ async def get_query_executions(
         if analysis_id:
             query = query.filter(QueryExecution.analysis_id == analysis_id)
             
-        executions = query.order_by(QueryExecution.execution_time.desc()).all()
-        
-        return [{
-            "id": exe.id,
-            "user_id": exe.user_id,
-            "analysis_id": exe.analysis_id,
-            "execution_time": exe.execution_time,
-            "execution_status": exe.execution_status,
-            "execution_duration": exe.execution_duration,
-            "error_message": exe.error_message
-        } for exe in executions]
+        # Let pydantic-core serialize the ORM rows directly instead of
+        # building an intermediate dict per row
+        return query.order_by(QueryExecution.execution_time.desc()).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
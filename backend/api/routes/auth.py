@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
@@ -177,24 +178,32 @@ async def google_login(
                 login_count=1
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            # flush assigns the id; a refresh after commit would just
+            # re-SELECT values this code already has in hand
+            db.flush()
         else:
-            # Update existing user
-            user.last_login_at = datetime.utcnow()
-            user.login_count += 1
+            # Increment atomically in SQL; a Python read-modify-write loses
+            # updates when the same user logs in concurrently
+            values = {
+                "last_login_at": datetime.utcnow(),
+                "login_count": User.login_count + 1
+            }
             if request.picture:
-                user.picture = request.picture
-            db.commit()
-            db.refresh(user)
-        
+                values["picture"] = request.picture
+            user = db.execute(
+                update(User)
+                .where(User.email == request.email)
+                .values(**values)
+                .returning(User.id, User.email, User.name, User.picture, User.role)
+            ).first()
+
         # Create access token
         access_token = create_access_token(
             data={"sub": user.email},
             expires_delta=timedelta(minutes=1440)  # 24 hours
         )
-        
-        return {
+
+        response = {
             "access_token": access_token,
             "token_type": "bearer",
             "user": {
@@ -205,6 +214,8 @@ async def google_login(
                 "role": user.role
             }
         }
+        db.commit()
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -6,7 +6,8 @@ from typing import List, Dict, Any, Optional
 import os
 import sqlite3
 import json
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 import re
 from pydantic import BaseModel
 from services.ai.analysis_service import AnalysisService
@@ -14,13 +15,20 @@ from sqlalchemy import create_engine, text
 
 router = APIRouter(prefix="/api/databases", tags=["databases"])
 
-# Configure OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Configure OpenAI (async client so LLM latency doesn't block the event
+# loop; AnalysisService awaits its calls). The shared keep-alive pool lets
+# repeated calls reuse warm TLS connections instead of handshaking per request.
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+)
 
 class SQLAnalysisRequest(BaseModel):
     sql_code: str
 
-def analyze_sql_with_llm(sql_code: str) -> Dict[str, Any]:
+async def analyze_sql_with_llm(sql_code: str) -> Dict[str, Any]:
     """
     Use LLM to analyze SQL code and extract data dictionary information
     """
@@ -71,7 +79,7 @@ def analyze_sql_with_llm(sql_code: str) -> Dict[str, Any]:
         5. Return only valid JSON without any additional text or explanations
         """
 
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a SQL expert that analyzes SQL code and extracts structured information."},
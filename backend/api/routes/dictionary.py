@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from core.database import get_db
-from models.base import DataDictionary, User
+from models.base import Analysis, DataDictionary, User
 from datetime import datetime
 
 router = APIRouter(prefix="/dictionary", tags=["dictionary"])
@@ -68,9 +68,8 @@ def create_sample_entries(db: Session):
     ]
     
     try:
-        for entry_data in sample_entries:
-            entry = DataDictionary(**entry_data)
-            db.add(entry)
+        # Bulk insert skips per-row identity-map bookkeeping
+        db.bulk_insert_mappings(DataDictionary, sample_entries)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -169,7 +168,10 @@ async def update_entry(
 ):
     """Update an existing dictionary entry"""
     try:
-        entry = db.query(DataDictionary).filter(DataDictionary.id == entry_id).first()
+        # Eager-load the analysis used by the permission check below
+        entry = db.query(DataDictionary).options(
+            joinedload(DataDictionary.analysis)
+        ).filter(DataDictionary.id == entry_id).first()
         if not entry:
             raise HTTPException(status_code=404, detail="Entry not found")
         
@@ -198,7 +200,10 @@ async def delete_entry(
 ):
     """Delete a dictionary entry"""
     try:
-        entry = db.query(DataDictionary).filter(DataDictionary.id == entry_id).first()
+        # Eager-load the analysis used by the permission check below
+        entry = db.query(DataDictionary).options(
+            joinedload(DataDictionary.analysis)
+        ).filter(DataDictionary.id == entry_id).first()
         if not entry:
             raise HTTPException(status_code=404, detail="Entry not found")
         
@@ -219,7 +224,9 @@ async def get_entry_history(
     db: Session = Depends(get_db)
 ):
     """Get the history of changes for a dictionary entry"""
-    entry = db.query(DataDictionary).filter(DataDictionary.id == entry_id).first()
+    entry = db.query(DataDictionary).options(
+        joinedload(DataDictionary.analysis).joinedload(Analysis.analyst)
+    ).filter(DataDictionary.id == entry_id).first()
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     
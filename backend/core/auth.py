@@ -3,9 +3,6 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
-from sqlalchemy.orm import Session
-from core.database import get_db
-from models.base import User
 
 # Secret key for JWT
 SECRET_KEY = "your-secret-key"  # In production, use environment variable
@@ -24,10 +21,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    """Return the verified JWT claims for the current user.
+
+    The role/is_admin claims are embedded at login, so authorization-only
+    routes (e.g. the config endpoints) can check them without issuing a
+    user SELECT per request. The HMAC check still guarantees integrity.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,13 +35,9 @@ def get_current_user(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user 
\ No newline at end of file
+
+    return payload 
\ No newline at end of file
@@ -1,8 +1,10 @@
 from fastapi import FastAPI, UploadFile, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, List, Dict
-from openai import OpenAI, OpenAIError
+import httpx
+from openai import AsyncOpenAI, OpenAIError
 import google.generativeai as genai
+import logging
 import os
 from dotenv import load_dotenv
 import json
@@ -20,11 +22,13 @@ from routes.dashboard import router as dashboard_router
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize database tables
 try:
     init_db()
 except Exception as e:
-    print(f"Failed to initialize database: {str(e)}")
+    logger.error("Failed to initialize database: %s", e)
     raise
 
 app = FastAPI(
@@ -58,12 +62,17 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 openai_client = None
 if openai_api_key:
     try:
-        openai_client = OpenAI(api_key=openai_api_key)
-        print(f"OpenAI client initialized successfully")
+        openai_client = AsyncOpenAI(
+            api_key=openai_api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+            )
+        )
+        logger.info("OpenAI client initialized successfully")
     except Exception as e:
-        print(f"Failed to initialize OpenAI client: {str(e)}")
+        logger.warning("Failed to initialize OpenAI client: %s", e)
 else:
-    print("OpenAI API key not found in environment variables")
+    logger.warning("OpenAI API key not found in environment variables")
 
 # Configure Gemini client
 google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -71,7 +80,7 @@ if google_api_key:
     try:
         genai.configure(api_key=google_api_key)
     except Exception as e:
-        print(f"Failed to initialize Gemini client: {str(e)}")
+        logger.warning("Failed to initialize Gemini client: %s", e)
 
 @app.get("/")
 async def root():
@@ -1,11 +1,15 @@
-from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, JSON, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
 
+# JSON payloads are stored as JSONB on PostgreSQL (binary, indexable, no
+# re-parse on read) while SQLite keeps the plain JSON type.
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
 class User(Base):
     __tablename__ = 'users'
     
@@ -18,8 +22,8 @@ class User(Base):
     first_login_at = Column(DateTime, nullable=True)
     last_login_at = Column(DateTime, nullable=True)
     login_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
 class Analysis(Base):
     __tablename__ = 'analyses'
@@ -30,14 +34,15 @@ class Analysis(Base):
     analyst_id = Column(Integer, ForeignKey('users.id'))
     status = Column(String)  # draft, pending_review, approved, rejected
     code_location = Column(String)  # Git repository URL
-    documentation = Column(JSON)
-    analysis_results = Column(JSON)  # Store the complete analysis results
+    code_hash = Column(String(32), index=True)  # Hash of the analyzed code, used to skip re-analysis
+    documentation = Column(JSONVariant)
+    analysis_results = Column(JSONVariant)  # Store the complete analysis results
     review_status = Column(String, default='pending')  # pending, in_review, reviewed
     reviewer_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    review_comments = Column(JSON)
+    review_comments = Column(JSONVariant)
     review_date = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     analyst = relationship("User", foreign_keys=[analyst_id], backref="analyses_created")
     reviewer = relationship("User", foreign_keys=[reviewer_id], backref="analyses_reviewed")
@@ -53,12 +58,12 @@ class DataDictionary(Base):
     column_name = Column(String, nullable=False)
     data_type = Column(String, nullable=False)
     description = Column(String)
-    valid_values = Column(JSON)
-    relationships = Column(JSON)
+    valid_values = Column(JSONVariant)
+    relationships = Column(JSONVariant)
     source = Column(String)
     version = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     created_by = Column(Integer, ForeignKey('users.id'), nullable=True)
     updated_by = Column(Integer, ForeignKey('users.id'), nullable=True)
     
@@ -73,11 +78,11 @@ class Review(Base):
     analysis_id = Column(Integer, ForeignKey('analyses.id'))
     reviewer_id = Column(Integer, ForeignKey('users.id'))
     status = Column(String)  # pending, in_progress, completed
-    comments = Column(JSON)
+    comments = Column(JSONVariant)
     rating = Column(Integer)
-    suggested_modifications = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    suggested_modifications = Column(JSONVariant)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     analysis = relationship("Analysis", back_populates="reviews")
     reviewer = relationship("User")
@@ -90,9 +95,9 @@ class CodeSnippet(Base):
     code = Column(String, nullable=False)
     language = Column(String)
     purpose = Column(String)
-    dependencies = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    dependencies = Column(JSONVariant)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     analysis = relationship("Analysis")
 
@@ -103,7 +108,7 @@ class QueryExecution(Base):
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     analysis_id = Column(Integer, ForeignKey('analyses.id'), nullable=False)
     query_content = Column(String, nullable=False)
-    execution_time = Column(DateTime, default=datetime.utcnow)
+    execution_time = Column(DateTime, server_default=func.now())
     execution_status = Column(String)  # success, failed
     error_message = Column(String, nullable=True)
     execution_duration = Column(Integer)  # in milliseconds
@@ -120,8 +125,8 @@ class Database(Base):
     description = Column(String)
     connection_string = Column(String)
     db_type = Column(String)  # sqlite, mysql, postgresql, etc.
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     tables = relationship("Table", back_populates="database", cascade="all, delete-orphan")
 
@@ -133,8 +138,8 @@ class Table(Base):
     name = Column(String, nullable=False)
     description = Column(String)
     row_count = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     database = relationship("Database", back_populates="tables")
     columns = relationship("Column", back_populates="table", cascade="all, delete-orphan")
@@ -150,7 +155,15 @@ class Column(Base):
     is_primary_key = Column(Integer, default=0)
     is_nullable = Column(Integer, default=1)
     default_value = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
-    table = relationship("Table", back_populates="columns") 
\ No newline at end of file
+    table = relationship("Table", back_populates="columns")
+
+# Indexes for the hot dashboard and auth predicates, so the status counts
+# and active-user count are served from indexes instead of full scans
+Index('ix_analyses_status', Analysis.status)
+Index('ix_query_executions_execution_status', QueryExecution.execution_status)
+Index('ix_users_active', User.id,
+      postgresql_where=User.login_count > 0,
+      sqlite_where=User.login_count > 0)
@@ -1,5 +1,12 @@
-from sqlalchemy import Column, String, DateTime, func
-from core.database import Base
+import time
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from models.base import Base
+
+# Configuration values change at most once per deployment, so cache reads
+# in process memory for a short TTL instead of hitting the DB per request
+_CACHE_TTL_SECONDS = 60
+_value_cache = {}
 
 class Configuration(Base):
     __tablename__ = 'configurations'
@@ -7,27 +14,42 @@ class Configuration(Base):
     key = Column(String, primary_key=True)
     value = Column(String, nullable=False)
     description = Column(String)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f"<Configuration(key='{self.key}', value='***')>"
 
     @classmethod
     def get_value(cls, session, key: str, default=None):
-        config = session.query(cls).filter(cls.key == key).first()
-        return config.value if config else default
+        cached = _value_cache.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        # session.get() checks the identity map first and uses the cached
+        # primary-key lookup path instead of compiling a filtered query
+        config = session.get(cls, key)
+        value = config.value if config else default
+        if config:
+            _value_cache[key] = (value, time.monotonic() + _CACHE_TTL_SECONDS)
+        return value
 
     @classmethod
     def set_value(cls, session, key: str, value: str, description: str = None):
-        config = session.query(cls).filter(cls.key == key).first()
+        """Stage a configuration change; the caller commits.
+
+        Flushing instead of committing lets batch init scripts write many
+        keys under a single transaction (one fsync per batch, not per key).
+        """
+        config = session.get(cls, key)
         if config:
             config.value = value
-            config.updated_at = func.now()
+            config.updated_at = datetime.utcnow()
             if description:
                 config.description = description
         else:
             config = cls(key=key, value=value, description=description)
             session.add(config)
-        session.commit()
-        return config 
\ No newline at end of file
+        session.flush()
+        _value_cache.pop(key, None)  # Invalidate so the next read sees the new value
+        return config
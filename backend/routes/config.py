@@ -59,4 +59,5 @@ async def create_configuration(
         raise HTTPException(status_code=403, detail="Not authorized to modify configurations")
     
     Configuration.set_value(db, config.key, config.value, config.description)
+    db.commit()
     return {"message": "Configuration updated successfully"} 
\ No newline at end of file
@@ -1,52 +1,55 @@
+import time
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from core.database import get_db
 from models.base import Analysis, QueryExecution, User
 
-router = APIRouter(tags=["dashboard"])
+router = APIRouter(tags=["dashboard"], default_response_class=ORJSONResponse)
+
+# The stats counts are O(table size); amortize them across requests with a
+# short in-process cache instead of recounting on every dashboard load
+_STATS_TTL_SECONDS = 30
+_stats_cache = (None, 0.0)
 
 @router.get("/stats")
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(db: Session = Depends(get_db)):
     """Get dashboard statistics"""
+    global _stats_cache
+    stats, expires = _stats_cache
+    if stats is not None and expires > time.monotonic():
+        return stats
     try:
-        # Count total analyses
-        total_analyses = db.query(func.count(Analysis.id)).scalar() or 0
-        
-        # Count analyses by status
-        pending_analyses = db.query(func.count(Analysis.id)).filter(
-            Analysis.status == "pending_review"
-        ).scalar() or 0
-        
-        approved_analyses = db.query(func.count(Analysis.id)).filter(
-            Analysis.status == "approved"
-        ).scalar() or 0
-        
-        # Count total query executions
-        total_queries = db.query(func.count(QueryExecution.id)).scalar() or 0
-        
-        # Count successful and failed queries
-        successful_queries = db.query(func.count(QueryExecution.id)).filter(
-            QueryExecution.execution_status == "success"
-        ).scalar() or 0
-        
-        failed_queries = db.query(func.count(QueryExecution.id)).filter(
-            QueryExecution.execution_status == "failed"
-        ).scalar() or 0
-        
+        # One aggregate query per table instead of one roundtrip per counter
+        total_analyses, pending_analyses, approved_analyses = db.query(
+            func.count(Analysis.id),
+            func.count(case((Analysis.status == "pending_review", 1))),
+            func.count(case((Analysis.status == "approved", 1)))
+        ).one()
+
+        total_queries, successful_queries, failed_queries = db.query(
+            func.count(QueryExecution.id),
+            func.count(case((QueryExecution.execution_status == "success", 1))),
+            func.count(case((QueryExecution.execution_status == "failed", 1)))
+        ).one()
+
         # Count active users (users who have logged in)
         active_users = db.query(func.count(User.id)).filter(
             User.login_count > 0
         ).scalar() or 0
-        
-        return {
-            "total_analyses": total_analyses,
-            "pending_analyses": pending_analyses,
-            "approved_analyses": approved_analyses,
-            "total_queries": total_queries,
-            "successful_queries": successful_queries,
-            "failed_queries": failed_queries,
+
+        stats = {
+            "total_analyses": total_analyses or 0,
+            "pending_analyses": pending_analyses or 0,
+            "approved_analyses": approved_analyses or 0,
+            "total_queries": total_queries or 0,
+            "successful_queries": successful_queries or 0,
+            "failed_queries": failed_queries or 0,
             "active_users": active_users
         }
+        _stats_cache = (stats, time.monotonic() + _STATS_TTL_SECONDS)
+        return stats
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
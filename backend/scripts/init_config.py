@@ -1,5 +1,3 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import sys
 import os
 
@@ -30,6 +28,7 @@ def initialize_config():
                 google_client_id,
                 "Google OAuth Client ID for authentication"
             )
+            db.commit()
             print("Configuration saved successfully!")
             
             # Verify the configuration was saved
@@ -1,294 +1,674 @@
+import asyncio
+import copy
+import logging
+import functools
+from collections import deque
+import hashlib
+import random
 import os
+import time
 import json
 import re
 import ast
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
+import orjson
 from fastapi import HTTPException
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError
 import google.generativeai as genai
+from core.database import SessionLocal
 from models.base import Analysis, DataDictionary, CodeSnippet, QueryExecution
 
+logger = logging.getLogger(__name__)
+
+# Precompiled SQL-DDL patterns for parse_sql; compiled once at import
+# instead of on every call through the pure-Python parse path
+_SQL_DETECT_RE = re.compile(r"CREATE\s+TABLE|ALTER\s+TABLE|SELECT\s+.*\s+FROM", re.IGNORECASE)
+_CREATE_HEAD_RE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([`\"]?\w+[`\"]?)?\s*\(", re.IGNORECASE)
+_FK_PREFIX_RE = re.compile(r"\s*FOREIGN\s+KEY\b", re.IGNORECASE)
+_FK_RE = re.compile(r"FOREIGN\s+KEY\s*\(([^)]+)\)\s*REFERENCES\s+([`\"]?\w+[`\"]?)\s*(?:\(([^)]+)\))?", re.IGNORECASE)
+_COL_NAME_RE = re.compile(r"([`\"]?\w+[`\"]?)\s+")
+_COL_TYPE_RE = re.compile(r"(\w+(?:\s*\([^)]*\))?)")
+_COMMENT_RE = re.compile(r"COMMENT\s+['\"]((?:[^'\"\\]|\\.)*)['\"]", re.IGNORECASE)
+_CONSTRAINT_RE = re.compile(
+    r"(?P<PRIMARY_KEY>\bPRIMARY\s+KEY\b)"
+    r"|(?P<UNIQUE>\bUNIQUE\b)"
+    r"|(?P<NOT_NULL>\bNOT\s+NULL\b)"
+    r"|(?P<DEFAULT>\bDEFAULT\s+(?:[^,\s]+|\([^)]+\)))"
+    r"|(?P<CHECK>\bCHECK\s*\([^)]+\))"
+    r"|(?P<AUTO_INCREMENT>\bAUTO_INCREMENT\b)",
+    re.IGNORECASE
+)
+_CONSTRAINT_NAMES = {
+    "PRIMARY_KEY": "PRIMARY KEY",
+    "UNIQUE": "UNIQUE",
+    "NOT_NULL": "NOT NULL",
+    "CHECK": "CHECK",
+    "AUTO_INCREMENT": "AUTO_INCREMENT"
+}
+
+_COL_SPLIT_EVENT_RE = re.compile(r"[,()'\"]")
+_PAREN_EVENT_RE = re.compile(r"[()'\"]")
+
+def _iter_create_table_blocks(sql_code: str):
+    """
+    Yield (table_name, body) for each CREATE TABLE statement
+
+    Matches only the statement head with a regex, then finds the closing
+    parenthesis with a counter that respects string literals. A lazy
+    [\\s\\S]*? body capture backtracks badly on malformed DDL where the
+    parens never balance; this scan stays linear in the source length.
+    """
+    for m in _CREATE_HEAD_RE.finditer(sql_code):
+        depth = 1
+        string_char = None
+        for ev in _PAREN_EVENT_RE.finditer(sql_code, m.end()):
+            ch = ev.group()
+            if string_char is not None:
+                if ch == string_char:
+                    string_char = None
+            elif ch in "'\"":
+                string_char = ch
+            elif ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+                if depth == 0:
+                    yield m.group(1), sql_code[m.end():ev.start()]
+                    break
+
+def _split_top_level(text: str) -> List[str]:
+    """
+    Split column definitions on top-level commas in one regex-driven pass
+
+    Jumps between delimiter events instead of branching on every
+    character, so cost scales with punctuation count rather than DDL size.
+    Commas inside parentheses or string literals do not split.
+    """
+    parts = []
+    start = 0
+    depth = 0
+    string_char = None
+    for m in _COL_SPLIT_EVENT_RE.finditer(text):
+        ch = m.group()
+        if string_char is not None:
+            if ch == string_char:
+                string_char = None
+        elif ch in "'\"":
+            string_char = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(text[start:m.start()].strip())
+            start = m.end()
+    tail = text[start:].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+@functools.lru_cache(maxsize=128)
+def _parse_sql_cached(sql_code: str) -> Dict:
+    tables = []
+
+    # Find all CREATE TABLE statements
+    for table_name, columns_text in _iter_create_table_blocks(sql_code):
+        if table_name:
+            table_name = table_name.strip('`"')
+
+        columns = []
+        relationships = []
+
+        # Split column definitions, handling commas inside parentheses
+        col_defs = _split_top_level(columns_text)
+
+        # Process each column definition
+        for col_def in col_defs:
+            # Skip empty definitions
+            if not col_def.strip():
+                continue
+
+            # Handle foreign key constraints
+            if _FK_PREFIX_RE.match(col_def):
+                fk_match = _FK_RE.search(col_def)
+                if fk_match:
+                    source_cols = [col.strip('`" ') for col in fk_match.group(1).split(',')]
+                    target_table = fk_match.group(2).strip('`"')
+                    target_cols = []
+                    if fk_match.group(3):
+                        target_cols = [col.strip('`" ') for col in fk_match.group(3).split(',')]
+                    else:
+                        target_cols = ['id']  # Default to 'id' if not specified
+
+                    relationships.append({
+                        "type": "foreign_key",
+                        "from_table": table_name,
+                        "from_fields": source_cols,
+                        "to_table": target_table,
+                        "to_fields": target_cols
+                    })
+                continue
+
+            # Extract column name
+            name_match = _COL_NAME_RE.match(col_def)
+            if not name_match:
+                continue
+
+            column_name = name_match.group(1).strip('`"')
+            remaining_def = col_def[len(name_match.group(0)):].strip()
+
+            # Extract data type
+            type_match = _COL_TYPE_RE.match(remaining_def)
+            if not type_match:
+                continue
+
+            data_type = type_match.group(1).strip()
+            remaining_def = remaining_def[len(type_match.group(0)):].strip()
+
+            # Extract comment if present
+            comment_match = _COMMENT_RE.search(remaining_def)
+            comment = comment_match.group(1) if comment_match else ""
+
+            # Extract constraints
+            # One alternation pass instead of six scans of the same
+            # string; the seen-set keeps at most one entry per kind
+            constraints = []
+            seen_constraints = set()
+            for constraint_match in _CONSTRAINT_RE.finditer(remaining_def):
+                kind = constraint_match.lastgroup
+                if kind in seen_constraints:
+                    continue
+                seen_constraints.add(kind)
+                if kind == "DEFAULT":
+                    default_value = constraint_match.group(0).split(None, 1)[1]
+                    constraints.append(f"DEFAULT {default_value}")
+                else:
+                    constraints.append(_CONSTRAINT_NAMES[kind])
+
+            columns.append({
+                "name": column_name,
+                "type": data_type,
+                "description": comment,
+                "constraints": constraints
+            })
+
+        tables.append({
+            "name": table_name,
+            "fields": columns,
+            "relationships": relationships
+        })
+
+    return {
+        "tables": tables,
+        "type": "sql_analysis"
+    }
+
+def parse_sql(sql_code: str) -> Dict:
+    """
+    Parse SQL code to extract table and column information
+
+    Module-level so callers can parse DDL without constructing a
+    DB-bound service. Results are memoized per source text; the deep
+    copy on return keeps callers that annotate the dict in place from
+    poisoning cached entries.
+    """
+    return copy.deepcopy(_parse_sql_cached(sql_code))
+
+# Containers worth descending into when only statements matter: statements
+# themselves plus the handler/case wrappers whose bodies hold statements
+_STMT_DESCENT_TYPES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+def _iter_nodes(root: ast.AST, types: frozenset, stmts_only: bool = False):
+    """
+    Yield nodes of the given exact types in breadth-first order
+
+    Iterative stand-in for ast.walk plus an isinstance ladder: one deque
+    instead of nested generator frames, and the exact-type membership
+    test filters nodes before any handler code runs. With stmts_only,
+    expression subtrees are pruned entirely — statements never nest
+    inside expressions, so callers after statement-level nodes skip the
+    bulk of the tree.
+    """
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        if type(node) in types:
+            yield node
+        if stmts_only:
+            queue.extend(
+                child for child in ast.iter_child_nodes(node)
+                if isinstance(child, _STMT_DESCENT_TYPES)
+            )
+        else:
+            queue.extend(ast.iter_child_nodes(node))
+
+# Node types extract_code_info cares about; everything else is skipped
+# before any handler runs
+_CODE_INFO_TYPES = frozenset({
+    ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef, ast.Assign
+})
+
+@functools.lru_cache(maxsize=128)
+def _parse_tree(code: str) -> ast.AST:
+    """
+    Parse code to an AST, memoizing repeat submissions
+
+    Iterative edits re-submit near-identical source over and over; a
+    cache hit skips the parse entirely. Callers must treat the returned
+    tree as read-only — anything that rewrites nodes (like
+    _condense_code) parses its own copy.
+    """
+    return ast.parse(code)
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced top-level {...} in text, or None
+
+    One linear scan with a brace counter that respects string literals
+    and escapes; salvages replies where the model wrapped valid JSON in
+    prose without resorting to backtracking regexes.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+class _RequestRateLimiter:
+    """
+    Token-bucket limiter for LLM requests per minute
+
+    A semaphore alone caps concurrency, not rate: 32 slots recycling fast
+    still exceed the per-minute quota. The bucket refills continuously so
+    short bursts pass while sustained load levels out at the quota.
+    """
+    def __init__(self, requests_per_minute: int):
+        self._capacity = float(requests_per_minute)
+        self._tokens = float(requests_per_minute)
+        self._refill_per_second = requests_per_minute / 60.0
+        self._last = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._last is not None:
+                self._tokens = min(
+                    self._capacity,
+                    self._tokens + (now - self._last) * self._refill_per_second
+                )
+            self._last = now
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self._refill_per_second)
+                self._last = loop.time()
+            else:
+                self._tokens -= 1.0
+                return
+            self._tokens = 0.0
+
+# Prompts above this size get condensed before hitting the LLM; tokens are
+# both latency and cost, and bodies/boilerplate don't change the dictionary
+_CONDENSE_THRESHOLD = 2000
+
+def _condense_code(code: str) -> str:
+    """
+    Shrink a large Python snippet to the parts dictionary extraction needs
+
+    Keeps class headers with their annotated fields, bare function
+    signatures and SQL-bearing lines. Non-Python or small inputs pass
+    through untouched.
+    """
+    if len(code) <= _CONDENSE_THRESHOLD:
+        return code
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+
+    parts = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            node.body = [
+                item for item in node.body if isinstance(item, ast.AnnAssign)
+            ] or [ast.Pass()]
+            parts.append(ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            node.body = [ast.Pass()]
+            parts.append(ast.unparse(node))
+
+    parts.extend(
+        line for line in code.splitlines()
+        if any(kw in line.upper() for kw in ("SELECT", "INSERT", "CREATE TABLE"))
+    )
+    condensed = "\n\n".join(parts)
+    return condensed if condensed else code
+
+# Prompt pieces are fixed module-level strings shared by both providers;
+# no per-call f-string formatting, and byte-identical prompts keep the
+# result cache coherent across OpenAI and Gemini
+_SYSTEM_PROMPT = "You are a code analysis expert. Extract data-related information from the code. Always respond with a single JSON object."
+_ANALYSIS_PROMPT_PREFIX = """Analyze this code and extract information about data structures, types, and relationships.
+Return the response in the following JSON format:
+{
+    "tables": [
+        {
+            "name": "table_name",
+            "fields": [
+                {
+                    "name": "field_name",
+                    "type": "field_type",
+                    "description": "field_description"
+                }
+            ]
+        }
+    ],
+    "relationships": [
+        {
+            "from_table": "source",
+            "to_table": "target",
+            "type": "relationship_type",
+            "from_field": "source_field",
+            "to_field": "target_field"
+        }
+    ],
+    "code_snippets": [
+        {
+            "code": "code_here",
+            "language": "language_name",
+            "description": "description"
+        }
+    ],
+    "data_sources": ["list_of_data_sources"],
+    "data_transformations": ["list_of_transformations"],
+    "potential_reuse_opportunities": ["list_of_opportunities"],
+    "documentation_summary": "summary_text"
+}
+
+Here's the code to analyze:
+
+"""
+_GEMINI_PROMPT_SUFFIX = """
+
+Remember to:
+1. Always return valid JSON
+2. Include all fields even if empty
+3. For each class, create a table entry with its fields
+4. Identify relationships between classes (e.g., foreign keys)
+5. Extract meaningful code snippets with descriptions
+6. Provide a comprehensive documentation summary"""
+
+# Static prefix of the SQL schema prompt, shared by the OpenAI and Gemini
+# paths of analyze_sql_with_llm. Byte-identical prefixes across calls also
+# let provider-side prompt caching hit
+_SQL_SCHEMA_PROMPT_PREFIX = """Analyze this SQL code and extract table and column information.
+Return the response in the following JSON format:
+{
+    "tables": [
+        {
+            "name": "table_name",
+            "fields": [
+                {
+                    "name": "field_name",
+                    "type": "field_type",
+                    "description": "field_description",
+                    "constraints": ["list_of_constraints"]
+                }
+            ],
+            "relationships": [
+                {
+                    "type": "foreign_key",
+                    "from_table": "source_table",
+                    "from_fields": ["source_fields"],
+                    "to_table": "target_table",
+                    "to_fields": ["target_fields"]
+                }
+            ]
+        }
+    ],
+    "type": "sql_analysis"
+}
+
+Here's the SQL code to analyze:
+
+"""
+
+# Cache of parsed LLM analysis results keyed by code hash, shared across the
+# per-request service instances so re-analysis of identical code is free
+_LLM_CACHE_MAX_SIZE = 256
+_LLM_CACHE_TTL_SECONDS = 86400
+_llm_result_cache = {}
+# Hit/miss counters so cache effectiveness shows up in diagnostics
+_llm_cache_hits = 0
+_llm_cache_misses = 0
+
+def _llm_cache_get(key: str) -> Optional[Dict]:
+    """Return a copy of a live cached result for key, or None."""
+    global _llm_cache_hits, _llm_cache_misses
+    entry = _llm_result_cache.get(key)
+    if entry is not None and entry["expires"] >= time.monotonic():
+        _llm_cache_hits += 1
+        return copy.deepcopy(entry["result"])
+    _llm_cache_misses += 1
+    return None
+
+def _llm_cache_set(key: str, result: Dict, model_used: str = "") -> None:
+    """Store a copy of result under key with the standard TTL."""
+    if len(_llm_result_cache) >= _LLM_CACHE_MAX_SIZE:
+        _llm_result_cache.clear()
+    _llm_result_cache[key] = {
+        "result": copy.deepcopy(result),
+        "model_used": model_used,
+        "expires": time.monotonic() + _LLM_CACHE_TTL_SECONDS
+    }
+
+# Cache of extracted code structures keyed by source text; review cycles
+# re-analyze the same snippet repeatedly and ast.parse holds the GIL
+_STRUCTURE_CACHE_MAX_SIZE = 1024
+_structure_cache = {}
+
+# Query-execution audit rows are buffered here and written in batches by a
+# background task, keeping the bookkeeping commit off the request path
+_QE_FLUSH_MAX_ROWS = 100
+_QE_FLUSH_INTERVAL_SECONDS = 1.0
+_QE_QUEUE_MAX_ROWS = 10_000
+_qe_queue = asyncio.Queue()
+_qe_drain_task = None
+
+def _record_query_execution(row: Dict) -> None:
+    """Queue a query-execution row and make sure the drain task is running."""
+    global _qe_drain_task
+    if _qe_queue.qsize() >= _QE_QUEUE_MAX_ROWS:
+        # Telemetry is best-effort: shed the oldest row rather than let an
+        # unhealthy database grow the buffer without bound
+        try:
+            _qe_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    _qe_queue.put_nowait(row)
+    if _qe_drain_task is None or _qe_drain_task.done():
+        _qe_drain_task = asyncio.get_running_loop().create_task(_drain_query_executions())
+
+async def _drain_query_executions() -> None:
+    """Write queued query-execution rows in batches; exits when idle."""
+    while True:
+        try:
+            rows = [await asyncio.wait_for(_qe_queue.get(), timeout=_QE_FLUSH_INTERVAL_SECONDS)]
+        except asyncio.TimeoutError:
+            return
+        while len(rows) < _QE_FLUSH_MAX_ROWS and not _qe_queue.empty():
+            rows.append(_qe_queue.get_nowait())
+        await asyncio.to_thread(_flush_query_executions, rows)
+
+def _flush_query_executions(rows: List[Dict]) -> None:
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(QueryExecution, rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning("Error recording query executions: %s", e)
+    finally:
+        db.close()
+
 class AnalysisService:
-    def __init__(self, db_session: Session, openai_client: OpenAI):
+    # Cap on concurrent LLM calls when batching, to stay under rate limits
+    MAX_CONCURRENT_LLM_CALLS = 32
+    # Sustained request rate ceiling (OpenAI's documented tier quota)
+    MAX_REQUESTS_PER_MINUTE = 500
+
+    def __init__(self, db_session: Session, openai_client: AsyncOpenAI,
+                 max_concurrent_llm_calls: Optional[int] = None):
         self.db = db_session
         self.ai = openai_client
-        
-        # Configure Gemini client if available
+        self._llm_semaphore = asyncio.Semaphore(
+            max_concurrent_llm_calls or self.MAX_CONCURRENT_LLM_CALLS
+        )
+        self._llm_rate_limiter = _RequestRateLimiter(self.MAX_REQUESTS_PER_MINUTE)
+
+        # Configure Gemini once at init; re-configuring per call only
+        # repeated the env lookup and library state mutation, and hid a
+        # missing key until the fallback actually fired
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
+        self._gemini_model = None
         if self.google_api_key:
             try:
                 genai.configure(api_key=self.google_api_key)
+                self._gemini_model = genai.GenerativeModel('gemini-1.5-pro')
             except Exception as e:
-                print(f"Failed to initialize Gemini client: {str(e)}")
+                logger.warning("Failed to initialize Gemini client: %s", e)
         
     def parse_sql(self, sql_code: str) -> Dict:
         """Parse SQL code to extract table and column information"""
-        tables = []
-        
-        # Pattern for CREATE TABLE statements
-        create_table_pattern = r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([`\"]?\w+[`\"]?)?\s*\(([\s\S]*?)\)(?:\s*;)?"
-        
-        # Find all CREATE TABLE statements
-        for match in re.finditer(create_table_pattern, sql_code, re.IGNORECASE):
-            table_name = match.group(1)
-            if table_name:
-                table_name = table_name.strip('`"')
-                
-            columns_text = match.group(2)
-            columns = []
-            relationships = []
-            
-            # Split column definitions, handling commas inside parentheses
-            col_defs = []
-            paren_count = 0
-            current_def = []
-            in_string = False
-            string_char = None
-            
-            for char in columns_text:
-                # Handle string literals
-                if char in ["'", '"'] and not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char and in_string:
-                    in_string = False
-                    string_char = None
-                # Handle parentheses only if not in string
-                elif not in_string:
-                    if char == '(':
-                        paren_count += 1
-                    elif char == ')':
-                        paren_count -= 1
-                    elif char == ',' and paren_count == 0:
-                        col_defs.append(''.join(current_def).strip())
-                        current_def = []
-                        continue
-                current_def.append(char)
-            
-            if current_def:
-                col_defs.append(''.join(current_def).strip())
-            
-            # Process each column definition
-            for col_def in col_defs:
-                # Skip empty definitions
-                if not col_def.strip():
-                    continue
-                    
-                # Handle foreign key constraints
-                if re.match(r"\s*FOREIGN\s+KEY\b", col_def, re.IGNORECASE):
-                    fk_match = re.search(r"FOREIGN\s+KEY\s*\(([^)]+)\)\s*REFERENCES\s+([`\"]?\w+[`\"]?)\s*(?:\(([^)]+)\))?", col_def, re.IGNORECASE)
-                    if fk_match:
-                        source_cols = [col.strip('`" ') for col in fk_match.group(1).split(',')]
-                        target_table = fk_match.group(2).strip('`"')
-                        target_cols = []
-                        if fk_match.group(3):
-                            target_cols = [col.strip('`" ') for col in fk_match.group(3).split(',')]
-                        else:
-                            target_cols = ['id']  # Default to 'id' if not specified
-                        
-                        relationships.append({
-                            "type": "foreign_key",
-                            "from_table": table_name,
-                            "from_fields": source_cols,
-                            "to_table": target_table,
-                            "to_fields": target_cols
-                        })
-                    continue
-                
-                # Extract column name
-                name_match = re.match(r"([`\"]?\w+[`\"]?)\s+", col_def)
-                if not name_match:
-                    continue
-                
-                column_name = name_match.group(1).strip('`"')
-                remaining_def = col_def[len(name_match.group(0)):].strip()
-                
-                # Extract data type
-                type_match = re.match(r"(\w+(?:\s*\([^)]*\))?)", remaining_def)
-                if not type_match:
-                    continue
-                
-                data_type = type_match.group(1).strip()
-                remaining_def = remaining_def[len(type_match.group(0)):].strip()
-                
-                # Extract comment if present
-                comment_match = re.search(r"COMMENT\s+['\"]((?:[^'\"\\]|\\.)*)['\"]", remaining_def, re.IGNORECASE)
-                comment = comment_match.group(1) if comment_match else ""
-                
-                # Extract constraints
-                constraints = []
-                constraint_patterns = [
-                    (r"\bPRIMARY\s+KEY\b", "PRIMARY KEY"),
-                    (r"\bUNIQUE\b", "UNIQUE"),
-                    (r"\bNOT\s+NULL\b", "NOT NULL"),
-                    (r"\bDEFAULT\s+(?:[^,\s]+|\([^)]+\))", "DEFAULT"),
-                    (r"\bCHECK\s*\([^)]+\)", "CHECK"),
-                    (r"\bAUTO_INCREMENT\b", "AUTO_INCREMENT")
-                ]
-                
-                for pattern, constraint_name in constraint_patterns:
-                    constraint_match = re.search(pattern, remaining_def, re.IGNORECASE)
-                    if constraint_match:
-                        if constraint_name == "DEFAULT":
-                            default_value = constraint_match.group(0).split(None, 1)[1]
-                            constraints.append(f"DEFAULT {default_value}")
-                        else:
-                            constraints.append(constraint_name)
-                
-                columns.append({
-                    "name": column_name,
-                    "type": data_type,
-                    "description": comment,
-                    "constraints": constraints
-                })
-            
-            tables.append({
-                "name": table_name,
-                "fields": columns,
-                "relationships": relationships
-            })
-        
-        return {
-            "tables": tables,
-            "type": "sql_analysis"
-        }
+        return parse_sql(sql_code)
 
     async def analyze_code(self, code: str, analysis_id: Optional[int] = None, user_id: Optional[int] = None) -> Dict:
         """
         Analyze code using OpenAI or Gemini to extract data dictionary information and optionally store results
         """
-        start_time = datetime.utcnow()
+        # Monotonic clock for the duration metric: immune to wall-clock
+        # jumps and skips two datetime allocations per request
+        start_ns = time.perf_counter_ns()
         execution_status = "success"
         error_message = None
+        # Audit-log prefix, computed once for both outcome paths; short
+        # inputs reuse the same string object rather than slicing a copy
+        query_content = code[:1000] if len(code) > 1000 else code
         
-        model_used = "OpenAI GPT-3.5 Turbo"
+        model_used = "OpenAI GPT-4o mini"
         try:
-            # First try to parse as SQL if it looks like SQL code
-            if re.search(r"CREATE\s+TABLE|ALTER\s+TABLE|SELECT\s+.*\s+FROM", code, re.IGNORECASE):
+            # First try to parse as SQL if it looks like SQL code. The
+            # cheap keyword scan over the uppercased head rejects ordinary
+            # Python without running the backtracking-prone regex; the
+            # precompiled pattern only confirms whitespace-tolerant hits
+            head = code[:4096].upper()
+            looks_like_sql = (
+                ("CREATE" in head and "TABLE" in head)
+                or ("ALTER" in head and "TABLE" in head)
+                or ("SELECT" in head and "FROM" in head)
+            )
+            if looks_like_sql and _SQL_DETECT_RE.search(code):
                 analysis_result = self.parse_sql(code)
                 if analysis_result["tables"]:  # If SQL parsing found tables
-                    model_used = "SQL Parser"
+                    # Set keys in place; copying the dict would duplicate
+                    # every table reference for nothing on large DDL
+                    analysis_result["model_used"] = "SQL Parser"
+                    analysis_result["documentation_summary"] = "SQL schema analysis"
                     return {
                         "analysis_id": analysis_id,
-                        "results": {
-                            **analysis_result,
-                            "model_used": model_used,
-                            "documentation_summary": "SQL schema analysis"
-                        }
+                        "results": analysis_result
                     }
             
-            # Try OpenAI first
-            try:
-                response = await self.ai.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a code analysis expert. Extract data-related information from the code."},
-                        {"role": "user", "content": f"""Analyze this code and extract information about data structures, types, and relationships.
-                        Return the response in the following JSON format:
-                        {{
-                            "tables": [
-                                {{
-                                    "name": "table_name",
-                                    "fields": [
-                                        {{
-                                            "name": "field_name",
-                                            "type": "field_type",
-                                            "description": "field_description"
-                                        }}
-                                    ]
-                                }}
-                            ],
-                            "relationships": [
-                                {{
-                                    "from_table": "source",
-                                    "to_table": "target",
-                                    "type": "relationship_type",
-                                    "from_field": "source_field",
-                                    "to_field": "target_field"
-                                }}
-                            ],
-                            "code_snippets": [
-                                {{
-                                    "code": "code_here",
-                                    "language": "language_name",
-                                    "description": "description"
-                                }}
-                            ],
-                            "data_sources": ["list_of_data_sources"],
-                            "data_transformations": ["list_of_transformations"],
-                            "potential_reuse_opportunities": ["list_of_opportunities"],
-                            "documentation_summary": "summary_text"
-                        }}
-
-                        Here's the code to analyze:
-
-                        {code}"""}
-                    ]
-                )
-                analysis_result = self._parse_ai_response(response.choices[0].message.content)
-            except Exception as openai_error:
-                print(f"OpenAI analysis failed: {str(openai_error)}, trying Gemini...")
-                # Try Gemini as fallback
+            # Identical code yields identical analysis (temperature is 0):
+            # serve repeats from the module-level cache instead of re-paying
+            # LLM latency and cost. The model name is part of the key so a
+            # model upgrade naturally invalidates old entries.
+            global _llm_cache_hits, _llm_cache_misses
+            cache_key = hashlib.sha256(f"gpt-4o-mini:{code}".encode()).hexdigest()
+            cached = _llm_result_cache.get(cache_key)
+            if cached is not None and cached["expires"] < time.monotonic():
+                cached = None
+            norm_key = None
+            if cached is None:
+                # Near-duplicate fallback: snippets differing only in
+                # whitespace or comments round-trip through ast.unparse to
+                # the same normalized text, so they share one LLM result
                 try:
-                    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-                    model = genai.GenerativeModel('gemini-1.5-pro')
-                    response = model.generate_content(
-                        f"""You are a code analysis expert. Analyze this code and extract information about data structures, types, and relationships.
-                        Return the response in the following JSON format:
-                        {{
-                            "tables": [
-                                {{
-                                    "name": "table_name",
-                                    "fields": [
-                                        {{
-                                            "name": "field_name",
-                                            "type": "field_type",
-                                            "description": "field_description"
-                                        }}
-                                    ]
-                                }}
-                            ],
-                            "relationships": [
-                                {{
-                                    "from_table": "source",
-                                    "to_table": "target",
-                                    "type": "relationship_type",
-                                    "from_field": "source_field",
-                                    "to_field": "target_field"
-                                }}
-                            ],
-                            "code_snippets": [
-                                {{
-                                    "code": "code_here",
-                                    "language": "language_name",
-                                    "description": "description"
-                                }}
-                            ],
-                            "data_sources": ["list_of_data_sources"],
-                            "data_transformations": ["list_of_transformations"],
-                            "potential_reuse_opportunities": ["list_of_opportunities"],
-                            "documentation_summary": "summary_text"
-                        }}
-
-                        Here's the code to analyze:
-
-                        {code}
-
-                        Remember to:
-                        1. Always return valid JSON
-                        2. Include all fields even if empty
-                        3. For each class, create a table entry with its fields
-                        4. Identify relationships between classes (e.g., foreign keys)
-                        5. Extract meaningful code snippets with descriptions
-                        6. Provide a comprehensive documentation summary"""
+                    normalized = ast.unparse(_parse_tree(code))
+                    norm_key = hashlib.sha256(
+                        f"gpt-4o-mini:norm:{normalized}".encode()
+                    ).hexdigest()
+                    cached = _llm_result_cache.get(norm_key)
+                    if cached is not None and cached["expires"] < time.monotonic():
+                        cached = None
+                except SyntaxError:
+                    pass
+            if cached is not None:
+                _llm_cache_hits += 1
+                analysis_result = dict(cached["result"])
+                model_used = cached["model_used"]
+            else:
+                _llm_cache_misses += 1
+                # Race both providers and take the first success; failure
+                # latency becomes min(openai, gemini) instead of the old
+                # sequential fallback's sum when OpenAI is slow or limited
+                tasks = {
+                    asyncio.create_task(self._openai_analysis(code)),
+                    asyncio.create_task(self._gemini_analysis(code)),
+                }
+                analysis_result = None
+                errors = []
+                pending = tasks
+                while pending and analysis_result is None:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            result, model = task.result()
+                        except Exception as e:
+                            errors.append(e)
+                            continue
+                        if analysis_result is None:
+                            analysis_result, model_used = result, model
+                for task in pending:
+                    task.cancel()
+                if analysis_result is None:
+                    raise Exception(
+                        "Both OpenAI and Gemini analysis failed: "
+                        + "; ".join(str(e) for e in errors)
                     )
-                    # Ensure we get the text content from the response
-                    analysis_result = self._parse_ai_response(response.text)
-                    model_used = "Gemini 1.5 Pro"
-                except Exception as gemini_error:
-                    raise Exception(f"Both OpenAI and Gemini analysis failed. OpenAI error: {str(openai_error)}, Gemini error: {str(gemini_error)}")
+
+                if len(_llm_result_cache) >= _LLM_CACHE_MAX_SIZE:
+                    _llm_result_cache.clear()
+                entry = {
+                    "result": dict(analysis_result),
+                    "model_used": model_used,
+                    "expires": time.monotonic() + _LLM_CACHE_TTL_SECONDS
+                }
+                _llm_result_cache[cache_key] = entry
+                if norm_key is not None:
+                    _llm_result_cache[norm_key] = entry
             
             # Store the model used in the analysis result
             analysis_result['model_used'] = model_used
@@ -296,7 +676,7 @@ class AnalysisService:
             # Create a new analysis if analysis_id is not provided
             if not analysis_id and user_id:
                 new_analysis = Analysis(
-                    title=f"Code Analysis {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
+                    title=f"Code Analysis {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())}",
                     description="Automated code analysis",
                     analyst_id=user_id,
                     status="draft",
@@ -304,9 +684,12 @@ class AnalysisService:
                 )
                 self.db.add(new_analysis)
                 try:
-                    self.db.commit()
-                    self.db.refresh(new_analysis)
+                    # flush assigns the PK without a second round trip; the
+                    # refresh-after-commit it replaces just re-SELECTed
+                    # values already in hand
+                    self.db.flush()
                     analysis_id = new_analysis.id
+                    self.db.commit()
                 except Exception as e:
                     self.db.rollback()
                     raise Exception(f"Error creating new analysis: {str(e)}")
@@ -324,37 +707,164 @@ class AnalysisService:
             raise Exception(f"Error analyzing code: {str(e)}")
         finally:
             if user_id:
-                end_time = datetime.utcnow()
-                duration = int((end_time - start_time).total_seconds() * 1000)  # Convert to milliseconds
+                duration = (time.perf_counter_ns() - start_ns) // 1_000_000  # milliseconds
                 
-                # Record query execution
-                query_execution = QueryExecution(
-                    user_id=user_id,
-                    analysis_id=analysis_id if analysis_id else None,
-                    query_content=code[:1000],  # Store first 1000 characters of the query
-                    execution_status=execution_status,
-                    error_message=error_message,
-                    execution_duration=duration
-                )
-                self.db.add(query_execution)
-                try:
-                    self.db.commit()
-                except Exception:
-                    self.db.rollback()
+                # Record query execution off the request path; the drain
+                # task batches these into one INSERT per flush
+                _record_query_execution({
+                    "user_id": user_id,
+                    "analysis_id": analysis_id if analysis_id else None,
+                    "query_content": query_content,  # First 1000 characters of the query
+                    "execution_status": execution_status,
+                    "error_message": error_message,
+                    "execution_duration": duration
+                })
     
+    def _analysis_messages(self, code: str) -> List[Dict]:
+        """
+        Chat messages for the data-dictionary extraction prompt
+        """
+        return [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": _ANALYSIS_PROMPT_PREFIX + _condense_code(code)}
+        ]
+
+    async def analyze_code_batch(self, codes: List[str], poll_interval: float = 10.0) -> List[Optional[Dict]]:
+        """
+        Analyze many snippets through the OpenAI Batch API
+
+        Batch jobs cost half the per-token price and bypass interactive
+        rate limits at the cost of minutes of turnaround, which suits bulk
+        or offline re-analysis. Falls back to bounded concurrent calls if
+        batch submission fails.
+        """
+        lines = [
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": "gpt-4o-mini",
+                    "temperature": 0,
+                    "max_tokens": 1024,
+                    "response_format": {"type": "json_object"},
+                    "messages": self._analysis_messages(code)
+                }
+            })
+            for i, code in enumerate(codes)
+        ]
+
+        try:
+            batch_file = await self.ai.files.create(
+                file=("analysis_batch.jsonl", "\n".join(lines).encode()),
+                purpose="batch"
+            )
+            batch = await self.ai.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            while batch.status in ("validating", "in_progress", "finalizing"):
+                await asyncio.sleep(poll_interval)
+                batch = await self.ai.batches.retrieve(batch.id)
+            if batch.status != "completed":
+                raise Exception(f"Batch {batch.id} ended with status {batch.status}")
+
+            output = await self.ai.files.content(batch.output_file_id)
+            results: List[Optional[Dict]] = [None] * len(codes)
+            for line in output.text.splitlines():
+                entry = orjson.loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") == 200:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    results[int(entry["custom_id"])] = self._parse_ai_response(content)
+            return results
+        except Exception as e:
+            logger.warning("Batch API unavailable (%s), falling back to concurrent calls", e)
+            gathered = await asyncio.gather(
+                *(self._openai_analysis(code) for code in codes),
+                return_exceptions=True
+            )
+            return [None if isinstance(r, BaseException) else r[0] for r in gathered]
+
+    async def _openai_analysis(self, code: str) -> Tuple[Dict, str]:
+        """
+        Analyze code with gpt-4o-mini, returning (parsed result, model name)
+
+        Temperature 0 with JSON mode keeps output deterministic (so the
+        code-hash cache hits reliably); the stream lets parsing start as
+        soon as the reply finishes arriving.
+        """
+        stream = await self._chat_completion_with_retry(
+            model="gpt-4o-mini",
+            temperature=0,
+            max_tokens=1024,
+            response_format={"type": "json_object"},
+            stream=True,
+            messages=self._analysis_messages(code)
+        )
+        parts = []
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+        return self._parse_ai_response(''.join(parts)), "OpenAI GPT-4o mini"
+
+    async def _gemini_analysis(self, code: str) -> Tuple[Dict, str]:
+        """
+        Analyze code with Gemini 1.5 Pro, returning (parsed result, model name)
+        """
+        if self._gemini_model is None:
+            raise Exception("Gemini client not configured")
+        # JSON output mode mirrors OpenAI's response_format, so both
+        # providers feed the same json.loads path
+        response = await self._gemini_model.generate_content_async(
+            "You are a code analysis expert. "
+            + _ANALYSIS_PROMPT_PREFIX
+            + _condense_code(code)
+            + _GEMINI_PROMPT_SUFFIX,
+            generation_config={"response_mime_type": "application/json"}
+        )
+        return self._parse_ai_response(response.text), "Gemini 1.5 Pro"
+
+    async def _chat_completion_with_retry(self, **kwargs):
+        """Call the chat completions API under the concurrency cap, backing
+        off on rate limits (honouring Retry-After when the API sends it)."""
+        for attempt in range(3):
+            try:
+                async with self._llm_semaphore:
+                    await self._llm_rate_limiter.acquire()
+                    return await self.ai.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                if attempt == 2:
+                    raise
+                retry_after = None
+                if e.response is not None:
+                    retry_after = e.response.headers.get("retry-after")
+                # Jitter spreads the retries of simultaneous 429s apart
+                backoff = float(retry_after) if retry_after else 2 ** attempt
+                await asyncio.sleep(backoff + random.uniform(0, 0.5))
+
     async def store_analysis_results(self, analysis_id: int, results: Dict) -> None:
         """
         Store analysis results in the database
         """
         try:
-            analysis = self.db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if not analysis:
+            # Targeted UPDATE: one round trip, and the (potentially large)
+            # analysis_results JSON never gets loaded back into the session
+            result = self.db.execute(
+                update(Analysis)
+                .where(Analysis.id == analysis_id)
+                .values(
+                    analysis_results=results,
+                    status='pending_review',
+                    review_status='pending'
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
                 raise Exception(f"Analysis with id {analysis_id} not found")
             
-            analysis.analysis_results = results
-            analysis.status = 'pending_review'
-            analysis.review_status = 'pending'
-            
             self.db.commit()
         except Exception as e:
             self.db.rollback()
@@ -365,14 +875,19 @@ class AnalysisService:
         Submit analysis for review
         """
         try:
-            analysis = self.db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if not analysis:
+            result = self.db.execute(
+                update(Analysis)
+                .where(Analysis.id == analysis_id)
+                .values(
+                    reviewer_id=reviewer_id,
+                    review_status='in_review',
+                    status='pending_review'
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
                 raise Exception(f"Analysis with id {analysis_id} not found")
             
-            analysis.reviewer_id = reviewer_id
-            analysis.review_status = 'in_review'
-            analysis.status = 'pending_review'
-            
             self.db.commit()
         except Exception as e:
             self.db.rollback()
@@ -383,19 +898,23 @@ class AnalysisService:
         Submit review for an analysis
         """
         try:
-            analysis = self.db.query(Analysis).filter(
-                Analysis.id == analysis_id,
-                Analysis.reviewer_id == reviewer_id
-            ).first()
-            
-            if not analysis:
+            result = self.db.execute(
+                update(Analysis)
+                .where(
+                    Analysis.id == analysis_id,
+                    Analysis.reviewer_id == reviewer_id
+                )
+                .values(
+                    review_comments=comments,
+                    review_status='reviewed',
+                    status='approved' if approved else 'rejected',
+                    review_date=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
                 raise Exception(f"Analysis with id {analysis_id} not found or not assigned to reviewer {reviewer_id}")
             
-            analysis.review_comments = comments
-            analysis.review_status = 'reviewed'
-            analysis.status = 'approved' if approved else 'rejected'
-            analysis.review_date = datetime.utcnow()
-            
             self.db.commit()
         except Exception as e:
             self.db.rollback()
@@ -417,147 +936,48 @@ class AnalysisService:
             
             response = response.strip()
             
-            # Try to parse the response as JSON
+            # Try to parse the response as JSON (orjson: C parser, 2-3x
+            # faster than stdlib on the large replies JSON mode produces);
+            # if that fails, salvage a balanced object embedded in prose
+            parsed_data = None
             try:
-                parsed_data = json.loads(response)
-                if isinstance(parsed_data, dict):
-                    # Ensure all required fields are present with default values
-                    return {
-                        "tables": parsed_data.get("tables", []),
-                        "relationships": parsed_data.get("relationships", []),
-                        "code_snippets": parsed_data.get("code_snippets", []),
-                        "data_sources": parsed_data.get("data_sources", []),
-                        "data_transformations": parsed_data.get("data_transformations", []),
-                        "potential_reuse_opportunities": parsed_data.get("potential_reuse_opportunities", []),
-                        "documentation_summary": parsed_data.get("documentation_summary", "")
-                    }
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {str(e)}")
-                print(f"Raw response: {response}")
+                parsed_data = orjson.loads(response)
+            except orjson.JSONDecodeError as e:
+                extracted = _extract_json_object(response)
+                if extracted is not None:
+                    try:
+                        parsed_data = orjson.loads(extracted)
+                    except orjson.JSONDecodeError:
+                        pass
+                if parsed_data is None:
+                    logger.warning("JSON parsing error: %s; raw response: %s", e, response)
 
-            # If JSON parsing fails, try to extract information using regex
-            analysis_data = {
+            if isinstance(parsed_data, dict):
+                # Ensure all required fields are present with default values
+                return {
+                    "tables": parsed_data.get("tables", []),
+                    "relationships": parsed_data.get("relationships", []),
+                    "code_snippets": parsed_data.get("code_snippets", []),
+                    "data_sources": parsed_data.get("data_sources", []),
+                    "data_transformations": parsed_data.get("data_transformations", []),
+                    "potential_reuse_opportunities": parsed_data.get("potential_reuse_opportunities", []),
+                    "documentation_summary": parsed_data.get("documentation_summary", "")
+                }
+
+            # Both providers run in enforced-JSON mode, so reaching here
+            # means a truly malformed reply; return the empty default
+            # rather than guessing at structure with regexes
+            return {
                 "tables": [],
                 "relationships": [],
                 "code_snippets": [],
                 "data_sources": [],
                 "data_transformations": [],
                 "potential_reuse_opportunities": [],
-                "documentation_summary": ""
+                "documentation_summary": "Could not parse AI response as JSON"
             }
-
-            # Extract tables and their fields using improved regex
-            table_pattern = r"(?:class|table)\s+(\w+)(?:\(.*?\))?[\s\n]*{([^}]+)}"
-            for match in re.finditer(table_pattern, response, re.MULTILINE | re.IGNORECASE):
-                table_name = match.group(1)
-                fields_text = match.group(2)
-                fields = []
-                
-                # Look for field definitions in various formats
-                field_patterns = [
-                    r"(\w+)\s*:\s*([\w\[\]\.]+)(?:\s*=\s*[^,\n]+)?(?:\s*#\s*(.+))?",  # Type hints
-                    r"self\.(\w+)\s*=\s*([^#\n]+)(?:\s*#\s*(.+))?",  # Instance variables with comments
-                    r"(\w+)\s*=\s*([^#\n]+)(?:\s*#\s*(.+))?"  # Assignments with comments
-                ]
-                
-                for pattern in field_patterns:
-                    for field_match in re.finditer(pattern, fields_text):
-                        field_name = field_match.group(1)
-                        field_type = field_match.group(2) if len(field_match.groups()) > 1 else "any"
-                        description = field_match.group(3) if len(field_match.groups()) > 2 else ""
-                        
-                        # Clean up the type if it's a value rather than a type
-                        if field_type and not any(type_word in field_type.lower() for type_word in ["str", "int", "float", "bool", "list", "dict", "any"]):
-                            # Try to infer type from the value
-                            if field_type.startswith('"') or field_type.startswith("'"):
-                                field_type = "str"
-                            elif field_type.replace(".", "").isdigit():
-                                field_type = "float" if "." in field_type else "int"
-                            elif field_type.lower() in ["true", "false"]:
-                                field_type = "bool"
-                            else:
-                                field_type = "any"
-                        
-                        fields.append({
-                            "name": field_name.strip(),
-                            "type": field_type.strip() if field_type else "any",
-                            "description": description.strip() if description else ""
-                        })
-                
-                if fields:  # Only add tables that have fields
-                    analysis_data["tables"].append({
-                        "name": table_name,
-                        "fields": fields
-                    })
-
-            # Extract relationships with improved pattern
-            rel_patterns = [
-                r"(?:relationship|foreign[\s_]key):\s*(\w+)\.(\w+)\s*->\s*(\w+)\.(\w+)",
-                r"(\w+)\s+references\s+(\w+)(?:\((\w+)\))?",
-                r"(?:self\.)?(\w+)(?:\s*=\s*|\s*:\s*).*?(?:id|ID|Id).*?#.*?(?:References|references|REFERENCES)\s+(\w+)"
-            ]
-            
-            for pattern in rel_patterns:
-                for match in re.finditer(pattern, response, re.MULTILINE | re.IGNORECASE):
-                    if len(match.groups()) == 4:  # First pattern
-                        analysis_data["relationships"].append({
-                            "from_table": match.group(1),
-                            "from_field": match.group(2),
-                            "to_table": match.group(3),
-                            "to_field": match.group(4),
-                            "type": "foreign_key"
-                        })
-                    elif len(match.groups()) == 2:  # Third pattern (comment-based)
-                        analysis_data["relationships"].append({
-                            "from_table": match.group(1),
-                            "to_table": match.group(2),
-                            "type": "foreign_key"
-                        })
-                    else:  # Second pattern
-                        analysis_data["relationships"].append({
-                            "from_table": match.group(1),
-                            "to_table": match.group(2),
-                            "to_field": match.group(3) if len(match.groups()) > 2 else "id",
-                            "type": "foreign_key"
-                        })
-
-            # Extract code snippets with language detection
-            code_pattern = r"```(\w+)?\n(.*?)```"
-            for match in re.finditer(code_pattern, response, re.DOTALL):
-                language = match.group(1) or "python"
-                code = match.group(2).strip()
-                analysis_data["code_snippets"].append({
-                    "code": code,
-                    "language": language.lower(),
-                    "description": ""
-                })
-
-            # Extract documentation summary
-            summary_patterns = [
-                r"(?:summary|documentation):\s*(.+?)(?=\n\n|\Z)",
-                r"\/\*\*\s*\n\s*\*\s*(.+?)\s*\n\s*\*\/",
-                r"#\s*(.+?)(?=\n\n|\Z)"  # Simple comment-based summary
-            ]
-            
-            for pattern in summary_patterns:
-                summary_match = re.search(pattern, response, re.DOTALL | re.IGNORECASE)
-                if summary_match:
-                    analysis_data["documentation_summary"] = summary_match.group(1).strip()
-                    break
-
-            # If no summary was found, generate one based on the tables and relationships
-            if not analysis_data["documentation_summary"]:
-                table_names = [table["name"] for table in analysis_data["tables"]]
-                if table_names:
-                    analysis_data["documentation_summary"] = f"Code defines {len(table_names)} main data structures: {', '.join(table_names)}."
-                    if analysis_data["relationships"]:
-                        analysis_data["documentation_summary"] += f" Contains {len(analysis_data['relationships'])} relationships between entities."
-
-            return analysis_data
-
         except Exception as e:
-            print(f"Error parsing AI response: {str(e)}")
-            print(f"Raw response: {response}")
+            logger.warning("Error parsing AI response: %s; raw response: %s", e, response)
             # Return a basic structure if parsing fails
             return {
                 "tables": [],
@@ -569,32 +989,59 @@ class AnalysisService:
                 "documentation_summary": f"Error parsing response: {str(e)}"
             }
     
-    def extract_code_structure(self, code: str) -> Dict:
+    def extract_code_structure(self, code: str, tree: Optional[ast.AST] = None) -> Dict:
         """
         Extract code structure using AST
+
+        Callers that already hold a parsed tree can pass it to skip the
+        duplicate ast.parse.
         """
+        # Cheap pre-filter: snippets from the UI are often SQL or config
+        # text, and rejecting those here skips the full parse-then-
+        # SyntaxError cost
+        if not any(tok in code for tok in ("class ", "def ", "import ")):
+            return {"data_structures": [], "functions": [], "imports": []}
+
+        cached = _structure_cache.get(code)
+        if cached is not None:
+            return cached
+
         try:
-            tree = ast.parse(code)
-            return self._analyze_ast(tree)
+            if tree is None:
+                tree = _parse_tree(code)
+            structure = self._analyze_ast(tree)
         except Exception as e:
             raise Exception(f"Error parsing code: {str(e)}")
+
+        if len(_structure_cache) >= _STRUCTURE_CACHE_MAX_SIZE:
+            _structure_cache.clear()
+        _structure_cache[code] = structure
+        return structure
     
     def _analyze_ast(self, tree: ast.AST) -> Dict:
         """
         Analyze the AST to extract relevant information
         """
-        data_structures = []
-        functions = []
-        imports = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                data_structures.append(self._analyze_class(node))
-            elif isinstance(node, ast.FunctionDef):
-                functions.append(self._analyze_function(node))
-            elif isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
-                imports.extend(self._analyze_import(node))
-                
+        data_structures: List[Dict] = []
+        functions: List[Dict] = []
+        imports: List[str] = []
+
+        # A dict probe on type(node) dispatches faster than NodeVisitor's
+        # getattr on a formatted method name, and walking only tree.body
+        # keeps the pass at O(statements) instead of O(all nodes) — methods
+        # are collected by _analyze_class, not re-emitted as functions
+        dispatch = {
+            ast.ClassDef: (self._analyze_class, data_structures.append),
+            ast.FunctionDef: (self._analyze_function, functions.append),
+            ast.Import: (self._analyze_import, imports.extend),
+            ast.ImportFrom: (self._analyze_import, imports.extend),
+        }
+        for node in tree.body:
+            entry = dispatch.get(type(node))
+            if entry is not None:
+                handler, sink = entry
+                sink(handler(node))
+
         return {
             "data_structures": data_structures,
             "functions": functions,
@@ -605,24 +1052,23 @@ class AnalysisService:
         """
         Analyze a class definition
         """
-        return {
-            "name": node.name,
-            "fields": self._extract_class_fields(node),
-            "methods": [m.name for m in node.body if isinstance(m, ast.FunctionDef)]
-        }
-    
-    def _extract_class_fields(self, node: ast.ClassDef) -> List[Dict]:
-        """
-        Extract fields from a class definition
-        """
+        # One pass over the body collects fields and methods together;
+        # async methods count as methods too
         fields = []
+        methods = []
         for item in node.body:
             if isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
                 fields.append({
                     "name": item.target.id,
                     "type": self._get_type_annotation(item.annotation)
                 })
-        return fields
+            elif isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                methods.append(item.name)
+        return {
+            "name": node.name,
+            "fields": fields,
+            "methods": methods
+        }
     
     def _analyze_function(self, node: ast.FunctionDef) -> Dict:
         """
@@ -638,13 +1084,13 @@ class AnalysisService:
         """
         Extract function arguments and their types
         """
-        args = []
-        for arg in node.args.args:
-            args.append({
+        return [
+            {
                 "name": arg.arg,
-                "type": self._get_type_annotation(arg.annotation) if hasattr(arg, "annotation") else None
-            })
-        return args
+                "type": self._get_type_annotation(arg.annotation)
+            }
+            for arg in node.args.args
+        ]
     
     def _analyze_import(self, node: ast.AST) -> List[str]:
         """
@@ -660,26 +1106,46 @@ class AnalysisService:
         """
         Get string representation of type annotation
         """
-        if node is None:
-            return None
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Subscript):
-            return f"{self._get_type_annotation(node.value)}[{self._get_type_annotation(node.slice)}]"
-        return str(node)
+        # ast.unparse walks in C and, unlike the old manual recursion,
+        # renders tuple slices like Dict[str, int] correctly
+        return None if node is None else ast.unparse(node)
     
     async def create_data_dictionary(self, analysis_id: int, code: str) -> List[DataDictionary]:
         """
         Create data dictionary entries from code analysis
         """
-        # Analyze code structure
-        code_structure = self.extract_code_structure(code)
-        
-        # Get AI insights
-        ai_analysis = await self.analyze_code(code)
+        # Run the CPU-bound AST work in a thread so it overlaps the
+        # network-bound LLM call instead of serializing in front of it.
+        # Parsing happens once here; the structure extraction and the
+        # chunk store below both consume the same tree
+        def _structure_and_tree():
+            try:
+                tree = _parse_tree(code)
+            except Exception:
+                tree = None
+            return self.extract_code_structure(code, tree), tree
+
+        (code_structure, tree), ai_analysis = await asyncio.gather(
+            asyncio.to_thread(_structure_and_tree),
+            self.analyze_code(code)
+        )
+
+        # Index the AI results once so each field below costs two dict
+        # lookups instead of three linear scans over the analysis
+        field_index = self._build_field_index(ai_analysis["results"])
+        relationship_index = self._build_relationship_index(ai_analysis["results"])
+
+        # One SELECT up front so a re-run skips fields that already have
+        # rows instead of constructing and inserting duplicates
+        existing = set(
+            self.db.execute(
+                select(DataDictionary.table_name, DataDictionary.column_name)
+                .where(DataDictionary.analysis_id == analysis_id)
+            ).all()
+        )
         
-        # Store code chunks
-        await self.store_code_chunks(analysis_id, code)
+        # Store code chunks, reusing the tree parsed above
+        await self.store_code_chunks(analysis_id, code, tree)
         
         # Combine structural and AI analysis
         data_dictionaries = []
@@ -687,178 +1153,238 @@ class AnalysisService:
         # Process data structures
         for structure in code_structure["data_structures"]:
             for field in structure["fields"]:
+                if (structure["name"], field["name"]) in existing:
+                    continue
+                existing.add((structure["name"], field["name"]))
                 dd = DataDictionary(
                     analysis_id=analysis_id,
                     table_name=structure["name"],
                     column_name=field["name"],
                     data_type=field["type"],
-                    description=self._get_ai_description(ai_analysis["results"], structure["name"], field["name"]),
-                    valid_values=self._get_ai_valid_values(ai_analysis["results"], structure["name"], field["name"]),
-                    relationships=self._get_ai_relationships(ai_analysis["results"], structure["name"], field["name"]),
+                    description=self._get_ai_description(field_index, structure["name"], field["name"]),
+                    valid_values=self._get_ai_valid_values(field_index, structure["name"], field["name"]),
+                    relationships=self._get_ai_relationships(relationship_index, structure["name"], field["name"]),
                     source="code_analysis",
                     version="1.0"
                 )
                 data_dictionaries.append(dd)
-                self.db.add(dd)  # Add each entry to the database session
         
-        # Also process tables from AI analysis that weren't found in code structure
+        # Also process tables from AI analysis that weren't found in code
+        # structure. A set lookup replaces the linear rescan of the growing
+        # row list on every table
+        seen_tables = {dd.table_name for dd in data_dictionaries}
+
         for table in ai_analysis["results"]["tables"]:
             table_name = table["name"]
             # Skip if we already processed this table from code structure
-            if not any(dd.table_name == table_name for dd in data_dictionaries):
+            if table_name not in seen_tables:
+                seen_tables.add(table_name)
                 for field in table["fields"]:
+                    if (table_name, field["name"]) in existing:
+                        continue
+                    existing.add((table_name, field["name"]))
                     dd = DataDictionary(
                         analysis_id=analysis_id,
                         table_name=table_name,
                         column_name=field["name"],
                         data_type=field["type"],
                         description=field.get("description"),
-                        valid_values=self._get_ai_valid_values(ai_analysis["results"], table_name, field["name"]),
-                        relationships=self._get_ai_relationships(ai_analysis["results"], table_name, field["name"]),
+                        valid_values=self._get_ai_valid_values(field_index, table_name, field["name"]),
+                        relationships=self._get_ai_relationships(relationship_index, table_name, field["name"]),
                         source="llm_analysis",
                         version="1.0"
                     )
                     data_dictionaries.append(dd)
-                    self.db.add(dd)  # Add each entry to the database session
         
         try:
+            # One bulk INSERT for the whole dictionary instead of a
+            # unit-of-work flush per row
+            self.db.bulk_save_objects(data_dictionaries)
             self.db.commit()  # Commit all entries to the database
         except Exception as e:
             self.db.rollback()
-            print(f"Error saving data dictionary entries: {str(e)}")
+            logger.warning("Error saving data dictionary entries: %s", e)
             raise
         
         return data_dictionaries
-    
-    def _get_ai_description(self, ai_analysis: Dict, table: str, column: str) -> Optional[str]:
+
+    async def create_data_dictionaries_batch(self, items: List[Tuple[int, str]]) -> List:
+        """
+        Create data dictionaries for many (analysis_id, code) pairs concurrently
+
+        LLM calls run in parallel; the semaphore inside
+        _chat_completion_with_retry bounds concurrency at the network call
+        itself, so a batch of N snippets costs roughly one LLM round trip
+        per concurrency slot instead of N sequential round trips.
+        """
+        async def _one(analysis_id: int, code: str):
+            return await self.create_data_dictionary(analysis_id, code)
+
+        return await asyncio.gather(
+            *(_one(analysis_id, code) for analysis_id, code in items),
+            return_exceptions=True
+        )
+
+    def _build_field_index(self, ai_analysis: Dict) -> Dict[Tuple[str, str], Dict]:
+        """
+        Index AI table fields by (table, column) for O(1) lookups
+        """
+        index = {}
+        for table_info in ai_analysis.get("tables", []):
+            table_name = table_info.get("name")
+            for field in table_info.get("fields", []):
+                index[(table_name, field.get("name"))] = field
+        return index
+
+    def _build_relationship_index(self, ai_analysis: Dict) -> Dict[Tuple[str, str], List[Dict]]:
+        """
+        Index AI relationships by their (table, column) endpoints
+        """
+        index = {}
+        for rel in ai_analysis.get("relationships", []):
+            index.setdefault((rel.get("from_table"), rel.get("from_field")), []).append({
+                "type": rel.get("type"),
+                "target_table": rel.get("to_table"),
+                "target_field": rel.get("to_field")
+            })
+            index.setdefault((rel.get("to_table"), rel.get("to_field")), []).append({
+                "type": rel.get("type"),
+                "source_table": rel.get("from_table"),
+                "source_field": rel.get("from_field")
+            })
+        return index
+
+    def _get_ai_description(self, field_index: Dict, table: str, column: str) -> Optional[str]:
         """
         Get AI-generated description for a field
         """
-        try:
-            # Look for field description in tables
-            for table_info in ai_analysis.get("tables", []):
-                if table_info["name"] == table:
-                    for field in table_info.get("fields", []):
-                        if field["name"] == column:
-                            return field.get("description")
-            return None
-        except Exception as e:
-            print(f"Error getting AI description: {str(e)}")
-            return None
-    
-    def _get_ai_valid_values(self, ai_analysis: Dict, table: str, column: str) -> Optional[Dict]:
+        field = field_index.get((table, column))
+        return field.get("description") if field else None
+
+    def _get_ai_valid_values(self, field_index: Dict, table: str, column: str) -> Optional[Dict]:
         """
         Get AI-suggested valid values for a field
         """
         try:
-            # Look for valid values in tables and code snippets
+            field = field_index.get((table, column))
+            if not field:
+                return None
+
             valid_values = {
                 "constraints": [],
                 "examples": [],
                 "data_type_specific": {}
             }
-            
-            # Check tables for type information
-            for table_info in ai_analysis.get("tables", []):
-                if table_info["name"] == table:
-                    for field in table_info.get("fields", []):
-                        if field["name"] == column:
-                            field_type = field.get("type", "").lower()
-                            # Add type-specific constraints
-                            if "int" in field_type or "float" in field_type or "decimal" in field_type:
-                                valid_values["data_type_specific"]["numeric"] = True
-                            elif "date" in field_type or "time" in field_type:
-                                valid_values["data_type_specific"]["temporal"] = True
-                            elif "bool" in field_type:
-                                valid_values["data_type_specific"]["boolean"] = True
-                                valid_values["constraints"].append("Values must be true/false")
-                            
-                            # Add any explicit constraints from description
-                            if field.get("description"):
-                                if "must be" in field["description"].lower():
-                                    valid_values["constraints"].append(field["description"])
-            
+
+            field_type = field.get("type", "").lower()
+            # Add type-specific constraints
+            if "int" in field_type or "float" in field_type or "decimal" in field_type:
+                valid_values["data_type_specific"]["numeric"] = True
+            elif "date" in field_type or "time" in field_type:
+                valid_values["data_type_specific"]["temporal"] = True
+            elif "bool" in field_type:
+                valid_values["data_type_specific"]["boolean"] = True
+                valid_values["constraints"].append("Values must be true/false")
+
+            # Add any explicit constraints from description
+            if field.get("description"):
+                if "must be" in field["description"].lower():
+                    valid_values["constraints"].append(field["description"])
+
             return valid_values if valid_values["constraints"] or valid_values["data_type_specific"] else None
         except Exception as e:
-            print(f"Error getting valid values: {str(e)}")
+            logger.warning("Error getting valid values: %s", e)
             return None
-    
-    def _get_ai_relationships(self, ai_analysis: Dict, table: str, column: str) -> Optional[Dict]:
+
+    def _get_ai_relationships(self, relationship_index: Dict, table: str, column: str) -> Optional[Dict]:
         """Get relationships from AI analysis for a specific table and column"""
-        if not ai_analysis or "relationships" not in ai_analysis:
-            return None
-        
-        relationships = []
-        for rel in ai_analysis["relationships"]:
-            if rel["from_table"] == table and rel["from_field"] == column:
-                relationships.append({
-                    "type": rel["type"],
-                    "target_table": rel["to_table"],
-                    "target_field": rel["to_field"]
-                })
-            elif rel["to_table"] == table and rel["to_field"] == column:
-                relationships.append({
-                    "type": rel["type"],
-                    "source_table": rel["from_table"],
-                    "source_field": rel["from_field"]
-                })
-        
+        relationships = relationship_index.get((table, column))
         return {"relationships": relationships} if relationships else None
 
-    async def store_code_chunks(self, analysis_id: int, code: str) -> None:
+    async def store_code_chunks(self, analysis_id: int, code: str,
+                                tree: Optional[ast.AST] = None) -> None:
         """
         Store code chunks in the database
+
+        Accepts a pre-parsed tree so callers that already parsed the
+        code do not pay for a second ast.parse.
         """
         try:
             # Parse the code into AST
-            tree = ast.parse(code)
-            
-            # Extract classes and functions
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
-                    # Get the code lines for this node
-                    start_line = node.lineno
-                    end_line = node.end_lineno
-                    lines = code.split('\n')[start_line-1:end_line]
-                    chunk_code = '\n'.join(lines)
-                    
-                    # Create code snippet
-                    code_snippet = CodeSnippet(
-                        analysis_id=analysis_id,
-                        code=chunk_code,
-                        language="python",
-                        purpose=f"{'Class' if isinstance(node, ast.ClassDef) else 'Function'} definition: {node.name}",
-                        dependencies=self._extract_dependencies(node)
-                    )
-                    self.db.add(code_snippet)
-            
+            if tree is None:
+                tree = _parse_tree(code)
+
+
+            # Extract classes and functions into plain dicts; one bulk
+            # INSERT replaces a unit-of-work flush per chunk
+            rows = []
+            # Split once up front; re-splitting the whole source per
+            # definition made chunk extraction quadratic in file length
+            all_lines = code.split('\n')
+            for node, dependencies in self._collect_definition_dependencies(tree).items():
+                # Get the code lines for this node
+                start_line = node.lineno
+                end_line = node.end_lineno
+                chunk_code = '\n'.join(all_lines[start_line-1:end_line])
+
+                rows.append({
+                    "analysis_id": analysis_id,
+                    "code": chunk_code,
+                    "language": "python",
+                    "purpose": f"{'Class' if isinstance(node, ast.ClassDef) else 'Function'} definition: {node.name}",
+                    "dependencies": dependencies
+                })
+
+            if rows:
+                self.db.bulk_insert_mappings(CodeSnippet, rows, render_nulls=True)
             self.db.commit()
         except Exception as e:
             self.db.rollback()
-            print(f"Error storing code chunks: {str(e)}")
+            logger.warning("Error storing code chunks: %s", e)
 
-    def _extract_dependencies(self, node: ast.AST) -> Dict:
+    def _collect_definition_dependencies(self, tree: ast.AST) -> Dict[ast.AST, Dict]:
         """
-        Extract dependencies from an AST node
+        Map each class/function definition to its dependency summary
+
+        One iterative depth-first pass with a stack of enclosing
+        definitions: import and call events append to every active
+        definition as they are met. Replaces a full ast.walk per
+        definition, which made dependency extraction quadratic in AST
+        size for large modules.
         """
-        dependencies = {
-            "imports": [],
-            "calls": [],
-            "attributes": []
-        }
-        
-        for child in ast.walk(node):
-            if isinstance(child, ast.Import):
-                dependencies["imports"].extend(n.name for n in child.names)
-            elif isinstance(child, ast.ImportFrom):
-                dependencies["imports"].append(f"{child.module}.{child.names[0].name}")
-            elif isinstance(child, ast.Call):
-                if isinstance(child.func, ast.Name):
-                    dependencies["calls"].append(child.func.id)
-                elif isinstance(child.func, ast.Attribute):
-                    dependencies["attributes"].append(f"{child.func.value.id}.{child.func.attr}")
-        
-        return dependencies
+        leave = object()  # sentinel marking the end of a definition's subtree
+        deps_by_node = {}
+        active = []
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node is leave:
+                active.pop()
+                continue
+            node_type = type(node)
+            if node_type is ast.ClassDef or node_type is ast.FunctionDef:
+                dependencies = {"imports": [], "calls": [], "attributes": []}
+                deps_by_node[node] = dependencies
+                active.append(dependencies)
+                stack.append(leave)
+            elif node_type is ast.Import:
+                names = [n.name for n in node.names]
+                for dependencies in active:
+                    dependencies["imports"].extend(names)
+            elif node_type is ast.ImportFrom:
+                name = f"{node.module}.{node.names[0].name}"
+                for dependencies in active:
+                    dependencies["imports"].append(name)
+            elif node_type is ast.Call and active:
+                if isinstance(node.func, ast.Name):
+                    for dependencies in active:
+                        dependencies["calls"].append(node.func.id)
+                elif isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
+                    name = f"{node.func.value.id}.{node.func.attr}"
+                    for dependencies in active:
+                        dependencies["attributes"].append(name)
+            stack.extend(ast.iter_child_nodes(node))
+        return deps_by_node
 
     async def analyze_sql_with_llm(self, sql_code: str) -> Dict:
         """Analyze SQL code using LLM to extract schema information"""
@@ -874,105 +1400,56 @@ class AnalysisService:
                     }
                 }
 
+            # Repeated submissions of DDL the parser cannot handle hit the
+            # shared cache instead of a second LLM round trip
+            cache_key = hashlib.sha256(f"sql-llm:{sql_code}".encode()).hexdigest()
+            cached = _llm_cache_get(cache_key)
+            if cached is not None:
+                return cached
+
             # If SQL parsing fails or finds no tables, try OpenAI
             try:
-                response = await self.ai.chat.completions.create(
+                response = await self._chat_completion_with_retry(
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a SQL expert. Extract schema information from SQL code."},
-                        {"role": "user", "content": f"""Analyze this SQL code and extract table and column information.
-                        Return the response in the following JSON format:
-                        {{
-                            "tables": [
-                                {{
-                                    "name": "table_name",
-                                    "fields": [
-                                        {{
-                                            "name": "field_name",
-                                            "type": "field_type",
-                                            "description": "field_description",
-                                            "constraints": ["list_of_constraints"]
-                                        }}
-                                    ],
-                                    "relationships": [
-                                        {{
-                                            "type": "foreign_key",
-                                            "from_table": "source_table",
-                                            "from_fields": ["source_fields"],
-                                            "to_table": "target_table",
-                                            "to_fields": ["target_fields"]
-                                        }}
-                                    ]
-                                }}
-                            ],
-                            "type": "sql_analysis"
-                        }}
-
-                        Here's the SQL code to analyze:
-
-                        {sql_code}"""}
+                        {"role": "user", "content": _SQL_SCHEMA_PROMPT_PREFIX + sql_code}
                     ]
                 )
                 analysis_result = self._parse_ai_response(response.choices[0].message.content)
-                return {
+                payload = {
                     "result": {
                         **analysis_result,
                         "model_used": "OpenAI GPT-3.5 Turbo",
                         "documentation_summary": "SQL schema analysis"
                     }
                 }
+                _llm_cache_set(cache_key, payload, "OpenAI GPT-3.5 Turbo")
+                return payload
             except Exception as openai_error:
-                print(f"OpenAI analysis failed: {str(openai_error)}, trying Gemini...")
+                logger.warning("OpenAI analysis failed: %s, trying Gemini...", openai_error)
                 # Try Gemini as fallback
                 try:
-                    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-                    model = genai.GenerativeModel('gemini-1.5-pro')
-                    response = model.generate_content(
-                        f"""You are a SQL expert. Analyze this SQL code and extract table and column information.
-                        Return the response in the following JSON format:
-                        {{
-                            "tables": [
-                                {{
-                                    "name": "table_name",
-                                    "fields": [
-                                        {{
-                                            "name": "field_name",
-                                            "type": "field_type",
-                                            "description": "field_description",
-                                            "constraints": ["list_of_constraints"]
-                                        }}
-                                    ],
-                                    "relationships": [
-                                        {{
-                                            "type": "foreign_key",
-                                            "from_table": "source_table",
-                                            "from_fields": ["source_fields"],
-                                            "to_table": "target_table",
-                                            "to_fields": ["target_fields"]
-                                        }}
-                                    ]
-                                }}
-                            ],
-                            "type": "sql_analysis"
-                        }}
-
-                        Here's the SQL code to analyze:
-
-                        {sql_code}"""
+                    if self._gemini_model is None:
+                        raise Exception("Gemini client not configured")
+                    response = await self._gemini_model.generate_content_async(
+                        "You are a SQL expert. " + _SQL_SCHEMA_PROMPT_PREFIX + sql_code
                     )
                     analysis_result = self._parse_ai_response(response.text)
-                    return {
+                    payload = {
                         "result": {
                             **analysis_result,
                             "model_used": "Google Gemini",
                             "documentation_summary": "SQL schema analysis"
                         }
                     }
+                    _llm_cache_set(cache_key, payload, "Google Gemini")
+                    return payload
                 except Exception as gemini_error:
-                    print(f"Gemini analysis failed: {str(gemini_error)}")
+                    logger.warning("Gemini analysis failed: %s", gemini_error)
                     raise
         except Exception as e:
-            print(f"Error analyzing SQL code: {str(e)}")
+            logger.warning("Error analyzing SQL code: %s", e)
             return {
                 "result": {
                     "tables": [],
@@ -985,22 +1462,23 @@ class AnalysisService:
     def extract_code_info(self, code: str) -> dict:
         """Extract basic information from code using AST."""
         try:
-            tree = ast.parse(code)
+            tree = _parse_tree(code)
             imports = []
             functions = []
             classes = []
             variables = []
             
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
+            for node in _iter_nodes(tree, _CODE_INFO_TYPES, stmts_only=True):
+                node_type = type(node)
+                if node_type is ast.Import:
                     imports.extend(n.name for n in node.names)
-                elif isinstance(node, ast.ImportFrom):
+                elif node_type is ast.ImportFrom:
                     imports.append(f"{node.module}.{node.names[0].name}")
-                elif isinstance(node, ast.FunctionDef):
+                elif node_type is ast.FunctionDef:
                     functions.append(node.name)
-                elif isinstance(node, ast.ClassDef):
+                elif node_type is ast.ClassDef:
                     classes.append(node.name)
-                elif isinstance(node, ast.Assign):
+                else:  # ast.Assign
                     for target in node.targets:
                         if isinstance(target, ast.Name):
                             variables.append(target.id)
@@ -1038,21 +1516,39 @@ class AnalysisService:
         {code}
         """
 
+        # Identical code re-analyzed during review cycles hits the shared
+        # in-process cache instead of re-paying seconds of API latency
+        cache_key = hashlib.sha256(f"gpt-3.5-turbo-16k:{code}".encode()).hexdigest()
+        cached = _llm_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            print("Attempting OpenAI API analysis...")
-            response = self.ai.chat.completions.create(
+            logger.debug("Attempting OpenAI API analysis...")
+            # Stream the reply so decoding starts as soon as the last
+            # token arrives instead of after the full 4000-token buffer
+            # is assembled server-side
+            stream = await self._chat_completion_with_retry(
                 model="gpt-3.5-turbo-16k",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": context}
                 ],
                 temperature=0.7,
-                max_tokens=4000
+                max_tokens=4000,
+                stream=True
             )
-            
-            return json.loads(response.choices[0].message.content)
+            parts = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+
+            result = orjson.loads(''.join(parts))
+            _llm_cache_set(cache_key, result, "OpenAI GPT-3.5 Turbo 16k")
+            return result
         except Exception as e:
-            print(f"OpenAI API Error: {str(e)}")
+            logger.warning("OpenAI API Error: %s", e)
             raise
 
     async def analyze_with_gemini(self, code: str, code_info: dict) -> dict:
@@ -1080,8 +1576,13 @@ class AnalysisService:
         IMPORTANT: Return ONLY the JSON object without any markdown formatting or code blocks.
         """
 
+        cache_key = hashlib.sha256(f"gemini-1.5-flash:{code}".encode()).hexdigest()
+        cached = _llm_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            print("Attempting Gemini API analysis...")
+            logger.debug("Attempting Gemini API analysis...")
             model = genai.GenerativeModel('gemini-1.5-flash')
             
             generation_config = {
@@ -1091,16 +1592,23 @@ class AnalysisService:
                 "max_output_tokens": 4000,
             }
             
-            response = model.generate_content(
+            # Stream chunks as they are generated rather than waiting for
+            # the whole reply to be buffered server-side
+            response = await model.generate_content_async(
                 prompt,
-                generation_config=generation_config
+                generation_config=generation_config,
+                stream=True
             )
-            
-            if not response.text:
+            parts = []
+            async for chunk in response:
+                if chunk.text:
+                    parts.append(chunk.text)
+            response_text = ''.join(parts)
+
+            if not response_text:
                 raise ValueError("Empty response from Gemini API")
-                
+
             # Clean up the response text
-            response_text = response.text
             # Remove markdown code block if present
             if response_text.startswith("```"):
                 response_text = response_text.split("```")[1]
@@ -1108,45 +1616,63 @@ class AnalysisService:
                     response_text = response_text[4:]
             response_text = response_text.strip()
             
-            print("Raw response:", response_text)
+            logger.debug("Raw response: %s", response_text)
                 
             try:
                 # Try to parse the response as JSON
-                result = json.loads(response_text)
+                result = orjson.loads(response_text)
+                _llm_cache_set(cache_key, result, "Gemini 1.5 Flash")
                 return result
-            except json.JSONDecodeError as je:
-                print(f"Failed to parse Gemini response as JSON: {str(je)}")
-                print(f"Raw response: {response_text}")
+            except orjson.JSONDecodeError as je:
+                logger.warning("Failed to parse Gemini response as JSON: %s; raw response: %s", je, response_text)
                 raise ValueError(f"Invalid JSON response from Gemini API: {str(je)}")
                 
         except Exception as e:
-            print(f"Gemini API Error: {str(e)}")
+            logger.warning("Gemini API Error: %s", e)
             raise
 
     async def analyze_code_with_llm(self, code: str) -> dict:
-        """Analyze code using available LLM services with fallback."""
+        """Analyze code using available LLM services, racing them concurrently.
+
+        Both calls are network-bound, so running them together makes the
+        failure-path latency min(openai, gemini) instead of their sum;
+        the first success wins and the loser is cancelled.
+        """
         code_info = self.extract_code_info(code)
-        errors = []
 
-        # Try OpenAI first if configured
+        labels = {}
         if self.ai:
-            try:
-                return await self.analyze_with_openai(code, code_info)
-            except Exception as e:
-                error_msg = str(e)
-                print(f"OpenAI analysis failed: {error_msg}")
-                errors.append(f"OpenAI Error: {error_msg}")
-
-        # Try Gemini as fallback
+            task = asyncio.create_task(self.analyze_with_openai(code, code_info))
+            labels[task] = "OpenAI"
         if self.google_api_key:
-            try:
-                return await self.analyze_with_gemini(code, code_info)
-            except Exception as e:
-                error_msg = str(e)
-                print(f"Gemini analysis failed: {error_msg}")
-                errors.append(f"Gemini Error: {error_msg}")
+            task = asyncio.create_task(self.analyze_with_gemini(code, code_info))
+            labels[task] = "Gemini"
+        if not labels:
+            raise HTTPException(
+                status_code=500,
+                detail="LLM analysis failed: no LLM services configured"
+            )
+
+        result = None
+        errors = []
+        pending = set(labels)
+        while pending and result is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    candidate = task.result()
+                except Exception as e:
+                    logger.warning("%s analysis failed: %s", labels[task], e)
+                    errors.append(f"{labels[task]} Error: {str(e)}")
+                    continue
+                if result is None:
+                    result = candidate
+        for task in pending:
+            task.cancel()
+        if result is not None:
+            return result
 
-        # If both failed, raise error with details
+        # If all configured services failed, raise error with details
         raise HTTPException(
             status_code=500,
             detail=f"LLM analysis failed with both services: {'; '.join(errors)}"
@@ -12,5 +12,6 @@ setup(
         "python-dotenv",
         "openai",
         "pydantic",
+        "orjson",
     ],
 ) 
\ No newline at end of file
@@ -2,20 +2,21 @@ import re
 import json
 from typing import Dict, Any
 
+# Regular expressions to match CREATE TABLE statements and column definitions,
+# compiled once at import instead of on every parse call
+_CREATE_TABLE_RE = re.compile(r"CREATE\s+TABLE\s+(\w+)\s*\((.*?)\);", re.DOTALL | re.IGNORECASE)
+_COLUMN_RE = re.compile(r"(\w+)\s+(\w+)(?:\s+(\w+))?", re.IGNORECASE)
+_FOREIGN_KEY_RE = re.compile(r"FOREIGN\s+KEY\s+\((\w+)\)\s+REFERENCES\s+(\w+)\((\w+)\)", re.IGNORECASE)
+
 def parse_sql_manually(sql_code: str) -> Dict[str, Any]:
     """
     Parse SQL code manually to extract basic information about tables and relationships
     """
     tables = []
     relationships = []
-    
-    # Regular expressions to match CREATE TABLE statements and column definitions
-    create_table_pattern = r"CREATE\s+TABLE\s+(\w+)\s*\((.*?)\);"
-    column_pattern = r"(\w+)\s+(\w+)(?:\s+(\w+))?"
-    foreign_key_pattern = r"FOREIGN\s+KEY\s+\((\w+)\)\s+REFERENCES\s+(\w+)\((\w+)\)"
-    
+
     # Find all CREATE TABLE statements
-    for table_match in re.finditer(create_table_pattern, sql_code, re.DOTALL | re.IGNORECASE):
+    for table_match in _CREATE_TABLE_RE.finditer(sql_code):
         table_name = table_match.group(1)
         columns_text = table_match.group(2)
         
@@ -27,9 +28,12 @@ def parse_sql_manually(sql_code: str) -> Dict[str, Any]:
         # Process each line in the columns text
         for line in columns_text.split(","):
             line = line.strip()
-            
+            # Uppercase once per line; the keyword gate below skips the
+            # foreign-key regex on ordinary column definitions
+            upper_line = line.upper()
+
             # Check if this line defines a foreign key
-            fk_match = re.search(foreign_key_pattern, line, re.IGNORECASE)
+            fk_match = _FOREIGN_KEY_RE.search(line) if "FOREIGN" in upper_line else None
             if fk_match:
                 from_column = fk_match.group(1)
                 to_table = fk_match.group(2)
@@ -45,17 +49,17 @@ def parse_sql_manually(sql_code: str) -> Dict[str, Any]:
                 continue
             
             # Check if this line defines a column
-            col_match = re.search(column_pattern, line, re.IGNORECASE)
+            col_match = _COLUMN_RE.search(line)
             if col_match:
                 col_name = col_match.group(1)
                 col_type = col_match.group(2)
-                
+
                 constraints = []
-                if "PRIMARY KEY" in line.upper():
+                if "PRIMARY KEY" in upper_line:
                     constraints.append("PRIMARY KEY")
-                if "NOT NULL" in line.upper():
+                if "NOT NULL" in upper_line:
                     constraints.append("NOT NULL")
-                if "UNIQUE" in line.upper():
+                if "UNIQUE" in upper_line:
                     constraints.append("UNIQUE")
                 
                 # Generate a simple description based on column name